@@ -112,13 +112,13 @@ def generate_from_real_specs():
     try:
         print(f"\n🔍 Alternative: Checking for existing SRS file...")
         srs_file = "SRS_v5.txt"  # Change this to your SRS filename
-        if uml_automation.read_srs_file(srs_file):
+        srs_content = uml_automation.read_srs_file(srs_file)
+        if srs_content:
             print(f"📄 Found SRS file: {srs_file}")
             
             user_input = input("Do you want to generate diagrams from the SRS file instead? (y/n): ")
             if user_input.lower() == 'y':
                 print("\n🚀 Generating comprehensive diagrams from SRS file...")
-                srs_content = uml_automation.read_srs_file(srs_file)
                 comprehensive_results = uml_automation.generate_comprehensive_design_set(srs_content)
                 
                 print(f"\n📊 SRS-based Generation Results:")
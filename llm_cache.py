@@ -0,0 +1,230 @@
+"""
+LLM Response Cache for Gemini Automation
+Stores Gemini responses in a local SQLite database, keyed by model and prompt, so repeated runs with
+byte-identical prompts (e.g. the test scripts) skip the API round-trip.
+
+The cache is opt-in: set the LLM_CACHE=1 environment variable to enable it.
+Set LLM_OFFLINE=1 to replay recorded responses only: the cache is used and a
+prompt without a recorded response raises instead of reaching Gemini.
+Set LLM_CACHE_TTL to a number of seconds to treat older entries as misses.
+"""
+
+import os
+import json
+import time
+import atexit
+import sqlite3
+import hashlib
+import threading
+from typing import Awaitable, Callable, Dict, Optional
+
+# Environment variable that switches the response cache on
+LLM_CACHE_ENV = "LLM_CACHE"
+
+# Environment variable that restricts requests to recorded responses
+LLM_OFFLINE_ENV = "LLM_OFFLINE"
+
+# Environment variable holding the maximum entry age in seconds (unset: entries never expire)
+LLM_CACHE_TTL_ENV = "LLM_CACHE_TTL"
+
+# SQLite database holding one row per cached response
+DEFAULT_CACHE_DB = ".llm_cache.db"
+
+
+def offline_mode() -> bool:
+    """Return True when only recorded responses may be used (LLM_OFFLINE=1)."""
+    return os.getenv(LLM_OFFLINE_ENV) == "1"
+
+
+def cache_enabled() -> bool:
+    """Return True when the response cache has been enabled via LLM_CACHE=1 or LLM_OFFLINE=1."""
+    return os.getenv(LLM_CACHE_ENV) == "1" or offline_mode()
+
+
+def cache_ttl() -> Optional[float]:
+    """Return the configured maximum entry age in seconds, or None if entries never expire."""
+    ttl = os.getenv(LLM_CACHE_TTL_ENV)
+    return float(ttl) if ttl else None
+
+
+def make_cache_key(model: str, prompt: str, temperature: float = 0, tools: tuple = (), context: Optional[str] = None,
+                   stop_after: Optional[str] = None) -> str:
+    """
+    Build the cache key for a Gemini request.
+
+    Args:
+        model (str): Model name
+        prompt (str): Prompt text
+        temperature (float): Sampling temperature
+        tools (tuple): Tool names made available to the model
+        context (str, optional): Identifier of any cached prompt prefix the request relies on
+        stop_after (str, optional): Marker the response was truncated after, if any
+
+    Returns:
+        str: SHA-256 hex digest of the request description
+    """
+    request = {
+        "model": model,
+        "prompt": prompt,
+        "temperature": temperature,
+        "tools": sorted(tools),
+        "context": context
+    }
+    # A truncated response must never answer a request for the full text (and vice versa);
+    # untruncated requests keep their existing keys
+    if stop_after is not None:
+        request["stop_after"] = stop_after
+    return hashlib.sha256(json.dumps(request, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class SQLiteCacheBackend:
+    """Stores cached responses in a single SQLite database keyed by request hash."""
+
+    def __init__(self, db_path: str = DEFAULT_CACHE_DB):
+        """
+        Initialize the SQLite cache backend.
+
+        Args:
+            db_path (str): Path of the cache database file
+        """
+        self.db_path = db_path
+        self.hits = 0
+        self.misses = 0
+        # Requests run on worker threads, so one connection is shared behind a lock
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache(key TEXT PRIMARY KEY, response TEXT NOT NULL, created_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def get(self, key: str, max_age: Optional[float] = None) -> Optional[str]:
+        """
+        Return the cached response text for key, or None on a miss.
+
+        Args:
+            key (str): Cache key from make_cache_key
+            max_age (float, optional): Treat entries older than this many seconds as misses
+        """
+        with self._lock:
+            row = self._conn.execute("SELECT response, created_at FROM cache WHERE key = ?", (key,)).fetchone()
+            if row is None or (max_age is not None and time.time() - row[1] > max_age):
+                self.misses += 1
+                return None
+            self.hits += 1
+        return row[0]
+
+    def set(self, key: str, response: str):
+        """Store a response text under key."""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache(key, response, created_at) VALUES (?, ?, ?)",
+                (key, response, time.time())
+            )
+            self._conn.commit()
+
+    def close(self):
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        """Hit/miss counters for this process."""
+        return {"hits": self.hits, "misses": self.misses}
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def _verbose() -> bool:
+    """Return True when cache diagnostics should be printed (VERBOSE set)."""
+    return bool(os.getenv("VERBOSE"))
+
+
+def _close_backend():
+    if _verbose():
+        print(f"🗄️  LLM cache stats: {_backend.stats}")
+    _backend.close()
+
+
+def get_cache() -> SQLiteCacheBackend:
+    """Return the process-wide cache backend, closing it (and reporting its stats if VERBOSE) at exit."""
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            _backend = SQLiteCacheBackend()
+            atexit.register(_close_backend)
+    return _backend
+
+
+def cached_generate(model: str, prompt: str, generate: Callable[[], str], context: Optional[str] = None,
+                    force_refresh: bool = False, stop_after: Optional[str] = None) -> str:
+    """
+    Return the cached response for a request, calling generate() and storing its result on a miss.
+
+    When the cache is disabled this simply returns generate(). In offline mode a
+    cache miss raises instead of calling generate(). With force_refresh the stored
+    entry is ignored and replaced by a fresh response.
+
+    Args:
+        model (str): Model name
+        prompt (str): Prompt text
+        generate (Callable[[], str]): Performs the actual Gemini call and returns the response text
+        context (str, optional): Identifier of any cached prompt prefix the request relies on
+        force_refresh (bool): Skip the lookup and overwrite the entry with a new response
+        stop_after (str, optional): Marker generate() stops reading the response after
+
+    Returns:
+        str: Response text
+    """
+    if not cache_enabled():
+        return generate()
+
+    cache = get_cache()
+    key = make_cache_key(model, prompt, context=context, stop_after=stop_after)
+    response = None if force_refresh else cache.get(key, cache_ttl())
+    if response is None:
+        if offline_mode():
+            raise Exception(f"No recorded response for this prompt (key {key[:12]}) and {LLM_OFFLINE_ENV}=1")
+        response = generate()
+        cache.set(key, response)
+    elif _verbose():
+        print("Response served from LLM cache")
+    return response
+
+
+async def cached_generate_async(model: str, prompt: str, generate: Callable[[], Awaitable[str]],
+                                context: Optional[str] = None, force_refresh: bool = False,
+                                stop_after: Optional[str] = None) -> str:
+    """
+    Async counterpart of cached_generate for callers using the SDK's async client.
+
+    Args:
+        model (str): Model name
+        prompt (str): Prompt text
+        generate (Callable[[], Awaitable[str]]): Coroutine function performing the actual Gemini call
+        context (str, optional): Identifier of any cached prompt prefix the request relies on
+        force_refresh (bool): Skip the lookup and overwrite the entry with a new response
+        stop_after (str, optional): Marker generate() stops reading the response after
+
+    Returns:
+        str: Response text
+    """
+    if not cache_enabled():
+        return await generate()
+
+    cache = get_cache()
+    key = make_cache_key(model, prompt, context=context, stop_after=stop_after)
+    response = None if force_refresh else cache.get(key, cache_ttl())
+    if response is None:
+        if offline_mode():
+            raise Exception(f"No recorded response for this prompt (key {key[:12]}) and {LLM_OFFLINE_ENV}=1")
+        response = await generate()
+        cache.set(key, response)
+    elif _verbose():
+        print("Response served from LLM cache")
+    return response
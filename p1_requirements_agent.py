@@ -10,15 +10,35 @@ This script automates the SRS (Software Requirements Specification) workflow:
 
 import os
 import sys
+import time
 import datetime
 import google.generativeai as genai
-from typing import Optional
+from typing import Dict, Optional, Tuple
 from dotenv import load_dotenv
 import PyPDF2
+from llm_cache import cached_generate
 
 # Load environment variables from .env file
 load_dotenv()
 
+# Extracted file contents keyed by path, each tagged with the (mtime_ns, size)
+# it was read at, so unchanged inputs (URD, IEEE PDF) are read only once per run
+_FILE_CONTENT_CACHE: Dict[str, Tuple[Tuple[int, int], str]] = {}
+
+
+def _file_fingerprint(path: str) -> Tuple[int, int]:
+    """Return (mtime_ns, size) for path; raises FileNotFoundError if it does not exist."""
+    st = os.stat(path)
+    return st.st_mtime_ns, st.st_size
+
+
+def _cached_file_content(path: str, fingerprint: Tuple[int, int]) -> Optional[str]:
+    """Return the cached content for path if it was read at the given fingerprint."""
+    cached = _FILE_CONTENT_CACHE.get(path)
+    if cached and cached[0] == fingerprint:
+        return cached[1]
+    return None
+
 
 class GeminiAutomation:
     """Class to handle SRS automation workflows with Google Gemini API."""
@@ -33,6 +53,7 @@ class GeminiAutomation:
         """
         self.api_key = api_key or os.getenv('GOOGLE_API_KEY')
         self.model = None
+        self.model_name = 'gemini-2.5-pro'
         
         if not self.api_key:
             raise ValueError("API key is required. Set GOOGLE_API_KEY environment variable or pass it directly.")
@@ -44,18 +65,19 @@ class GeminiAutomation:
             genai.configure(api_key=self.api_key)
             
             # Initialize the Gemini 2.5 Pro model
-            self.model = genai.GenerativeModel('gemini-2.5-pro')
+            self.model = genai.GenerativeModel(self.model_name)
             print("Gemini 2.5 Pro model initialized successfully!")
             
         except Exception as e:
             raise Exception(f"Failed to initialize Gemini model: {e}")
     
-    def send_prompt(self, prompt: str) -> str:
+    def send_prompt(self, prompt: str, force_refresh: bool = False) -> str:
         """
         Send a prompt to Gemini and return the response.
         
         Args:
             prompt (str): The prompt to send to Gemini
+            force_refresh (bool): Bypass the response cache and store the new answer
             
         Returns:
             str: Gemini's response
@@ -64,14 +86,17 @@ class GeminiAutomation:
             raise Exception("Gemini model not initialized. Call setup_gemini() first.")
         
         try:
-            print(f"Sending prompt to Gemini...")
-            response = self.model.generate_content(prompt)
+            def generate():
+                print(f"Sending prompt to Gemini...")
+                response = self.model.generate_content(prompt)
+                
+                if response.text:
+                    print("Response received successfully!")
+                    return response.text
+                else:
+                    raise Exception("No response text received from Gemini")
             
-            if response.text:
-                print("Response received successfully!")
-                return response.text
-            else:
-                raise Exception("No response text received from Gemini")
+            return cached_generate(self.model_name, prompt, generate, force_refresh=force_refresh)
                 
         except Exception as e:
             raise Exception(f"Failed to send prompt to Gemini: {e}")
@@ -90,6 +115,12 @@ class GeminiAutomation:
             if not os.path.exists(pdf_path):
                 raise FileNotFoundError(f"PDF file not found: {pdf_path}")
             
+            fingerprint = _file_fingerprint(pdf_path)
+            text_content = _cached_file_content(pdf_path, fingerprint)
+            if text_content is not None:
+                print(f"Reusing extracted PDF text: {pdf_path} ({len(text_content)} characters)")
+                return text_content
+            
             print(f"Reading PDF file: {pdf_path}")
             text_content = ""
             
@@ -101,6 +132,7 @@ class GeminiAutomation:
                     text_content += page.extract_text() + "\n"
             
             print(f"Successfully extracted text from PDF ({len(text_content)} characters)")
+            _FILE_CONTENT_CACHE[pdf_path] = (fingerprint, text_content)
             return text_content
             
         except Exception as e:
@@ -120,12 +152,19 @@ class GeminiAutomation:
             if not os.path.exists(file_path):
                 raise FileNotFoundError(f"Text file not found: {file_path}")
             
+            fingerprint = _file_fingerprint(file_path)
+            content = _cached_file_content(file_path, fingerprint)
+            if content is not None:
+                print(f"Reusing text file: {file_path} ({len(content)} characters)")
+                return content
+            
             print(f"Reading text file: {file_path}")
             
             with open(file_path, 'r', encoding='utf-8') as file:
                 content = file.read()
             
             print(f"Successfully read text file ({len(content)} characters)")
+            _FILE_CONTENT_CACHE[file_path] = (fingerprint, content)
             return content
             
         except Exception as e:
@@ -727,13 +766,17 @@ Security & Privacy:
         except Exception as e:
             raise Exception(f"Test SRS generation failed: {e}")
     
-    def run_iterative_srs_improvement(self, max_iterations: int = 10, target_errors: int = 0):
+    def run_iterative_srs_improvement(self, max_iterations: int = 10, target_errors: int = 0,
+                                      convergence_delta: Optional[int] = None, poll_interval_s: float = 0):
         """
         Run iterative SRS improvement loop: Generation → Validation → Review until errors = 0 or max iterations.
         
         Args:
             max_iterations (int): Maximum number of iterations (default 10, max SRS_v10)
             target_errors (int): Target error count to stop iteration (default 0)
+            convergence_delta (int, optional): Stop early when an iteration removes fewer than
+                                             this many errors (default None, never stop early)
+            poll_interval_s (float): Pause between iterations, e.g. to pace API usage (default 0)
             
         Returns:
             dict: Results summary including final version, error count, and iteration count
@@ -750,6 +793,7 @@ Security & Privacy:
             
             current_version = 1
             current_errors = float('inf')  # Start with high error count
+            stalled = False
             
             # Generate initial SRS (v1)
             print(f"\n🚀 ITERATION {current_version}: Generating initial SRS")
@@ -780,6 +824,7 @@ Security & Privacy:
                 )
                 
                 # Extract error count
+                previous_errors = current_errors
                 current_errors = self.extract_error_count(validation_report)
                 print(f"📊 Validation completed: {current_errors} errors found")
                 
@@ -793,6 +838,13 @@ Security & Privacy:
                     print(f"⚠️  Maximum iterations ({max_iterations}) reached")
                     break
                 
+                # Stop when the last review barely moved the error count
+                if (convergence_delta is not None and previous_errors != float('inf')
+                        and previous_errors - current_errors < convergence_delta):
+                    print(f"⚠️  Converged: errors {previous_errors} → {current_errors} (improvement below {convergence_delta})")
+                    stalled = True
+                    break
+                
                 # Step 2: Review and improve SRS
                 next_version = current_version + 1
                 next_srs_file = f"SRS_v{next_version}.txt"
@@ -815,6 +867,9 @@ Security & Privacy:
                 srs_file = next_srs_file
                 
                 print(f"✅ Iteration completed. Moving to version {current_version}")
+                
+                if poll_interval_s > 0:
+                    time.sleep(poll_interval_s)
             
             # Final results
             print("\n" + "=" * 60)
@@ -826,6 +881,7 @@ Security & Privacy:
                 'final_error_count': current_errors,
                 'iterations_completed': current_version,
                 'target_reached': current_errors <= target_errors,
+                'stalled': stalled,
                 'final_srs_file': f"SRS_v{current_version}.txt",
                 'final_srsvr_file': os.path.join("reports", f"SRSVR_v{current_version}.txt")
             }
@@ -837,6 +893,8 @@ Security & Privacy:
             
             if final_results['target_reached']:
                 print(f"🎉 SRS successfully improved to {target_errors} errors!")
+            elif stalled:
+                print(f"⚠️  Process stopped after converging with {current_errors} errors remaining")
             else:
                 print(f"⚠️  Process stopped at maximum iterations with {current_errors} errors remaining")
             
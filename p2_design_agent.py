@@ -13,21 +13,318 @@ This script automates UML diagram generation using PlantUML:
 """
 
 import os
+import re
 import sys
+import atexit
+import asyncio
+import shutil
+import hashlib
 import datetime
+import functools
+import threading
 import subprocess
 import google.generativeai as genai
-from typing import Optional, Dict, List
+from collections import deque
+from types import MappingProxyType
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Optional, Dict, List, Mapping
 from dotenv import load_dotenv
 from validation_handler import ValidationHandler
+from llm_cache import cached_generate
 
 # Load environment variables from .env file
 load_dotenv()
 
+# Stands in for the requirements text when it is already held in Gemini's context cache
+CACHED_REQUIREMENTS_REFERENCE = "(Provided above in the cached requirements context)"
+
+# First complete PlantUML block in a Gemini response, and markdown fence lines around bare code
+PLANTUML_BLOCK_RE = re.compile(r'@startuml.*?@enduml', re.S)
+CODE_FENCE_LINE_RE = re.compile(r'^[^\S\n]*```[^\n]*(?:\n|$)', re.M)
+
+# Tagged per-diagram blocks returned by the combined refinement prompt
+REFINED_DIAGRAM_BLOCK_RE = re.compile(r'<(class|sequence|activity)>(.*?)</\1>', re.S)
+
+# Separator PlantUML writes after each image in -pipe mode
+PLANTUML_PIPE_DELIMITER = b"___PLANTUML_IMAGE_END___"
+PLANTUML_PIPE_TIMEOUT = 30  # seconds before a stuck pipe render is killed
+
+# Per-file syntax error line PlantUML prints on stderr, e.g. "Error line 12 in file: x.puml"
+PLANTUML_ERROR_FILE_RE = re.compile(r'^Error line \d+ in file: (.+?)\s*$', re.M)
+
+# Supported diagram types (read-only, shared by every UMLDiagramAutomation)
+DIAGRAM_TYPES = MappingProxyType({
+    'usecase': 'Use Case Diagram',
+    'class': 'Class Diagram', 
+    'sequence': 'Sequence Diagram',
+    'activity': 'Activity Diagram',
+    'component': 'Component Diagram',
+    'state': 'State Diagram',
+    'deployment': 'Deployment Diagram',
+    'object': 'Object Diagram',
+    'communication': 'Communication Diagram',
+    'timing': 'Timing Diagram'
+})
+DIAGRAM_TYPE_KEYS = tuple(DIAGRAM_TYPES)
+
+# SRS section markers used by generate_comprehensive_design_set
+DATA_REQUIREMENTS_MARKER = "3.6 Data Requirements"
+ERROR_HANDLING_MARKER = "Error Handling"
+FUNCTIONAL_FEATURES = (
+    ("Vehicle Monitoring", "VM-1"),
+    ("Charging Management", "CM-1"),
+    ("Vehicle Control", "VC-1"),
+    ("Trip Planning", "TP-1")
+)
+SRS_SECTION_MARKER_RE = re.compile("|".join(
+    re.escape(marker) for marker in
+    (DATA_REQUIREMENTS_MARKER, ERROR_HANDLING_MARKER, *(code for _, code in FUNCTIONAL_FEATURES))
+))
+
+# SRS size (characters) above which generate_diagram sends only the sections listed for
+# the diagram type in DIAGRAM_SECTIONS; types not listed always receive the full SRS
+SRS_PROMPT_CHAR_BUDGET = 24000
+DIAGRAM_SECTIONS = MappingProxyType({
+    'class': (DATA_REQUIREMENTS_MARKER,),
+    'object': (DATA_REQUIREMENTS_MARKER,),
+    'sequence': tuple(code for _, code in FUNCTIONAL_FEATURES),
+    'communication': tuple(code for _, code in FUNCTIONAL_FEATURES),
+    'activity': (*(code for _, code in FUNCTIONAL_FEATURES), ERROR_HANDLING_MARKER)
+})
+
+# Upper bound on Gemini requests in flight at once, to stay within rate limits
+MAX_CONCURRENT_PROMPTS = 4
+
+# JVM options for every PlantUML run: allow images beyond the default 4096px limit
+PLANTUML_JAVA_OPTS = ["-DPLANTUML_LIMIT_SIZE=16384"]
+
+# Heap per concurrently rasterised diagram, and the most diagrams a batch run renders at once.
+# A large diagram near PLANTUML_LIMIT_SIZE needs most of a 1 GB heap by itself, so the batch
+# thread count is capped and the heap grows with it instead of sharing one fixed -Xmx.
+PLANTUML_HEAP_PER_THREAD_MB = 1024
+PLANTUML_MAX_BATCH_THREADS = 4
+
+
+def _plantuml_short_run_opts(threads: int = 1) -> List[str]:
+    """
+    JVM options for a short-lived PlantUML run rendering up to `threads` diagrams at once.
+    
+    C1-only JIT, class data sharing and a serial-GC heap start faster than the server
+    defaults (not used for the long-lived pipe).
+    """
+    return PLANTUML_JAVA_OPTS + [
+        "-XX:TieredStopAtLevel=1", "-Xshare:auto", "-XX:+UseSerialGC", "-Xms256m",
+        f"-Xmx{PLANTUML_HEAP_PER_THREAD_MB * threads}m"
+    ]
+
+
+# Options for single-diagram runs (version check, syntax check, one-shot render)
+PLANTUML_SHORT_RUN_OPTS = _plantuml_short_run_opts()
+
+# Verified PNG renders keyed by PUML content hash, so unchanged refinements skip the JVM
+RENDER_CACHE_DIR = os.path.join("reports", ".cache")
+
+
+def _png_path(puml_path: str) -> str:
+    """Return the PNG path PlantUML writes for puml_path (same directory and base name)."""
+    return os.path.splitext(puml_path)[0] + '.png'
+
+
+def _render_cache_path(puml_content: str) -> str:
+    """Return the render cache entry for PlantUML source with this exact content."""
+    content_hash = hashlib.blake2b(puml_content.encode('utf-8'), digest_size=16).hexdigest()
+    return os.path.join(RENDER_CACHE_DIR, f"{content_hash}.png")
+
+
+def _store_render(puml_content: str, image_path: str):
+    """Add a render that PlantUML reported no error for to the render cache."""
+    try:
+        os.makedirs(RENDER_CACHE_DIR, exist_ok=True)
+        shutil.copyfile(image_path, _render_cache_path(puml_content))
+    except OSError as e:
+        print(f"⚠️  Could not store render cache entry: {e}")
+
+
+def _plantuml_error_files(stderr: str, puml_paths: List[str]) -> set:
+    """
+    Return the members of puml_paths that PlantUML reported a syntax error for.
+    
+    Args:
+        stderr (str): PlantUML's stderr from a multi-file run
+        puml_paths (List[str]): The .puml paths passed to that run
+        
+    Returns:
+        set: Paths named in an "Error line N in file: X" line
+    """
+    by_abspath = {os.path.normcase(os.path.abspath(path)): path for path in puml_paths}
+    by_name = {}
+    for path in puml_paths:
+        by_name.setdefault(os.path.basename(path), []).append(path)
+    
+    failed = set()
+    for reported in PLANTUML_ERROR_FILE_RE.findall(stderr or ""):
+        path = by_abspath.get(os.path.normcase(os.path.abspath(reported)))
+        if path is None and len(by_name.get(os.path.basename(reported), ())) == 1:
+            path = by_name[os.path.basename(reported)][0]
+        if path is not None:
+            failed.add(path)
+    return failed
+
+
+def _quick_valid_puml(puml_content: str) -> bool:
+    """
+    Cheap check run by every render path before paying for a PlantUML render.
+    
+    Only rejects sources PlantUML cannot render at all (no @startuml/@enduml pair, e.g. a
+    hand-edited file picked up by regenerate_images); syntax is left to PlantUML itself.
+    """
+    puml_content = puml_content.strip()
+    return puml_content.startswith('@startuml') and puml_content.endswith('@enduml')
+
+
+@functools.lru_cache(maxsize=4)
+def _srs_section_starts(srs_content: str) -> Mapping[str, int]:
+    """Return the offset of the first occurrence of every SRS section marker, found in one pass."""
+    section_starts = {}
+    for match in SRS_SECTION_MARKER_RE.finditer(srs_content):
+        section_starts.setdefault(match.group(), match.start())
+    return MappingProxyType(section_starts)
+
+
+def _srs_section(srs_content: str, marker: str, start: int) -> str:
+    """Return the text of the SRS section that begins with marker at offset start."""
+    if marker == DATA_REQUIREMENTS_MARKER:
+        end = srs_content.find("**4.", start)
+        if end == -1:
+            end = len(srs_content)
+    elif marker == ERROR_HANDLING_MARKER:
+        end = srs_content.find("**", start + 100)
+        if end == -1:
+            end = start + 1000
+    else:
+        # Functional feature: runs to the next major section
+        end = srs_content.find("\n    *", start + 100)
+        if end == -1:
+            end = start + 2000  # Reasonable default
+    return srs_content[start:end]
+
+
+def _select_srs_sections(diagram_type: str, srs_content: str) -> str:
+    """
+    Return the SRS text to put in the prompt for diagram_type.
+    
+    Args:
+        diagram_type (str): Type of diagram being generated
+        srs_content (str): Full SRS content
+        
+    Returns:
+        str: The sections listed in DIAGRAM_SECTIONS when the SRS exceeds SRS_PROMPT_CHAR_BUDGET,
+             otherwise (or when none of those sections are present) the full SRS
+    """
+    markers = DIAGRAM_SECTIONS.get(diagram_type)
+    if not markers or len(srs_content) <= SRS_PROMPT_CHAR_BUDGET:
+        return srs_content
+    
+    section_starts = _srs_section_starts(srs_content)
+    sections = [_srs_section(srs_content, marker, section_starts[marker])
+                for marker in markers if marker in section_starts]
+    return "\n\n".join(sections) if sections else srs_content
+
 
 class UMLDiagramAutomation:
     """Class to handle UML diagram generation workflows with Google Gemini API and PlantUML."""
     
+    diagram_types = DIAGRAM_TYPES
+    
+    # Prompt scaffolding for the diagram generators, filled in with str.format
+    _BASE_TMPL = """
+You are a senior software architect and UML modeling expert. You need to create a {diagram_name} in PlantUML format based on the provided Software Requirements Specification (SRS).
+
+IMPORTANT INSTRUCTIONS:
+1. Generate ONLY PlantUML code - no explanations, comments, or additional text
+2. Start with @startuml and end with @enduml
+3. Use proper PlantUML syntax for {diagram_type} diagrams
+4. Follow UML best practices and conventions
+5. Make the diagram comprehensive but readable
+6. Use appropriate relationships and stereotypes
+7. Include relevant details from the SRS
+
+SRS CONTENT:
+{srs_content}
+
+Generate a complete {diagram_name} in PlantUML format:
+"""
+    
+    _STRUCTURE_TMPL = """
+Task: Create a Class Diagram based on the following requirements text.
+
+You are a senior software architect. Create a comprehensive Class Diagram in PlantUML format.
+
+Specific Constraints:
+1. Identify the Attributes (fields) and Operations (methods) for each class
+2. Define the Relationships: 
+   - Use --|> for inheritance
+   - Use *-- for composition  
+   - Use o-- for aggregation
+3. Add Multiplicity (e.g., 1..*) to every relationship
+4. Generate ONLY PlantUML code - no explanations
+
+Input Text:
+{data_requirements_text}
+
+Generate PlantUML Class Diagram code:
+"""
+    
+    _SEQUENCE_TMPL = """
+Task: Create a Sequence Diagram for the "{feature_name}" feature based on the text below.
+
+You are a senior software architect. Create a detailed Sequence Diagram in PlantUML format.
+
+Specific Constraints:
+1. Use autonumber to index the steps
+2. Clearly define participants: 
+   - actor User
+   - participant App  
+   - participant API
+   - database DB
+3. Use alt/else blocks to handle the "Sad Paths" (errors/failures) mentioned in the text
+4. Generate ONLY PlantUML code - no explanations
+
+Input Text:
+{functional_requirements_text}
+
+Generate PlantUML Sequence Diagram code:
+"""
+    
+    _ACTIVITY_TMPL = """
+Task: Create an Activity Diagram representing the logic flow of the text below.
+
+You are a senior software architect. Create a comprehensive Activity Diagram in PlantUML format using MODERN PlantUML syntax.
+
+CRITICAL SYNTAX REQUIREMENTS:
+1. Start with: start
+2. End with: stop
+3. Use :Action description; for activities
+4. Use if (condition?) then (yes/no) for decisions with proper endif
+5. Use -> for flow connections
+6. NO old syntax like (*) start or (*) stop
+7. Example structure:
+   start
+   :First Action;
+   if (condition?) then (yes)
+     :Action if true;
+   else (no)
+     :Action if false;
+   endif
+   :Final Action;
+   stop
+
+Input Text (focus on business logic and decision flows):
+{workflow_text}
+
+Generate ONLY valid modern PlantUML Activity Diagram code:
+"""
+    
     def __init__(self, api_key: Optional[str] = None):
         """
         Initialize the UMLDiagramAutomation class.
@@ -40,24 +337,27 @@ class UMLDiagramAutomation:
         self.model = None
         self.plantuml_jar_path = "plantuml/plantuml.jar"
         self.diagrams_dir = "uml_diagrams"
+        self.model_name = 'gemini-2.5-pro'
+        self._cached_models = {}
+        self._cached_content_digests = {}
+        self._plantuml_proc = None
+        self._plantuml_lock = threading.Lock()
+        self._plantuml_atexit_registered = False
+        self._inflight_prompts = {}
+        self._inflight_lock = threading.Lock()
         
-        # Supported diagram types
-        self.diagram_types = {
-            'usecase': 'Use Case Diagram',
-            'class': 'Class Diagram', 
-            'sequence': 'Sequence Diagram',
-            'activity': 'Activity Diagram',
-            'component': 'Component Diagram',
-            'state': 'State Diagram',
-            'deployment': 'Deployment Diagram',
-            'object': 'Object Diagram',
-            'communication': 'Communication Diagram',
-            'timing': 'Timing Diagram'
-        }
+        # Output directory for each diagram type, joined once
+        self._type_dirs = {diagram_type: os.path.join(self.diagrams_dir, diagram_type) for diagram_type in self.diagram_types}
         
         if not self.api_key:
             raise ValueError("API key is required. Set GOOGLE_API_KEY environment variable or pass it directly.")
     
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close_plantuml_pipe()
+    
     def setup_gemini(self):
         """Configure and initialize the Gemini model."""
         try:
@@ -65,7 +365,7 @@ class UMLDiagramAutomation:
             genai.configure(api_key=self.api_key)
             
             # Initialize the Gemini 2.5 Pro model
-            self.model = genai.GenerativeModel('gemini-2.5-pro')
+            self.model = genai.GenerativeModel(self.model_name)
             print("Gemini 2.5 Pro model initialized successfully!")
             
         except Exception as e:
@@ -74,17 +374,13 @@ class UMLDiagramAutomation:
     def setup_directories(self):
         """Create necessary directories for UML diagrams."""
         try:
-            if not os.path.exists(self.diagrams_dir):
-                os.makedirs(self.diagrams_dir)
-                print(f"Created directory: {self.diagrams_dir}")
+            # exist_ok avoids a separate exists() check per directory and is safe under concurrent setup
+            os.makedirs(self.diagrams_dir, exist_ok=True)
             
             # Create subdirectories for each diagram type
-            for diagram_type in self.diagram_types.keys():
-                type_dir = os.path.join(self.diagrams_dir, diagram_type)
-                if not os.path.exists(type_dir):
-                    os.makedirs(type_dir)
-                    print(f"Created directory: {type_dir}")
-                    
+            for type_dir in self._type_dirs.values():
+                os.makedirs(type_dir, exist_ok=True)
+                
         except Exception as e:
             raise Exception(f"Failed to setup directories: {e}")
     
@@ -96,7 +392,7 @@ class UMLDiagramAutomation:
             
             # Test PlantUML installation
             result = subprocess.run(
-                ["java", "-jar", self.plantuml_jar_path, "-version"],
+                ["java", *PLANTUML_SHORT_RUN_OPTS, "-jar", self.plantuml_jar_path, "-version"],
                 capture_output=True,
                 text=True,
                 check=True
@@ -110,12 +406,59 @@ class UMLDiagramAutomation:
         except Exception as e:
             raise Exception(f"Failed to verify PlantUML: {e}")
     
-    def send_prompt(self, prompt: str) -> str:
+    def create_requirements_cache(self, requirements: str, ttl_minutes: int = 30) -> Optional[str]:
+        """
+        Upload a requirements slice to Gemini context caching so repeated prompts
+        can reference it instead of re-sending the full text.
+        
+        Args:
+            requirements (str): Requirements text to cache
+            ttl_minutes (int): Lifetime of the cached content in minutes
+            
+        Returns:
+            str: Name of the cached content, or None if caching is unavailable
+                 (e.g. the text is below Gemini's minimum cacheable size)
+        """
+        try:
+            cache = genai.caching.CachedContent.create(
+                model=f"models/{self.model_name}",
+                contents=[requirements],
+                ttl=datetime.timedelta(minutes=ttl_minutes)
+            )
+            print(f"Requirements cached in Gemini context: {cache.name}")
+            self._cached_content_digests[cache.name] = hashlib.sha256(requirements.encode('utf-8')).hexdigest()
+            return cache.name
+        except Exception as e:
+            print(f"⚠️  Context caching unavailable, sending full prompts: {e}")
+            return None
+    
+    def delete_requirements_cache(self, cached_content: Optional[str]):
+        """
+        Delete a requirements cache created by create_requirements_cache.
+        
+        Args:
+            cached_content (str, optional): Name of the cached content (None is ignored)
+        """
+        if not cached_content:
+            return
+        try:
+            genai.caching.CachedContent.get(cached_content).delete()
+            self._cached_models.pop(cached_content, None)
+            self._cached_content_digests.pop(cached_content, None)
+        except Exception as e:
+            print(f"⚠️  Failed to delete cached content {cached_content}: {e}")
+    
+    def send_prompt(self, prompt: str, cached_content: Optional[str] = None, force_refresh: bool = False, stop_after: Optional[str] = None) -> str:
         """
         Send a prompt to Gemini and return the response.
         
         Args:
             prompt (str): The prompt to send to Gemini
+            cached_content (str, optional): Name of a Gemini cached content to use
+                                          as the prompt prefix
+            force_refresh (bool): Bypass the response cache and store the new answer
+            stop_after (str, optional): Stream the response and stop reading once this
+                                      marker (e.g. "@enduml") has arrived
             
         Returns:
             str: Gemini's response
@@ -124,18 +467,97 @@ class UMLDiagramAutomation:
             raise Exception("Gemini model not initialized. Call setup_gemini() first.")
         
         try:
-            print(f"Sending prompt to Gemini...")
-            response = self.model.generate_content(prompt)
+            model = self.model
+            if cached_content:
+                if cached_content not in self._cached_models:
+                    self._cached_models[cached_content] = genai.GenerativeModel.from_cached_content(cached_content)
+                model = self._cached_models[cached_content]
+            
+            def generate_streamed():
+                print(f"Sending prompt to Gemini (streaming)...")
+                text = ""
+                for chunk in model.generate_content(prompt, stream=True):
+                    try:
+                        text += chunk.text
+                    except ValueError:
+                        # Chunks without text parts (e.g. the final metadata chunk)
+                        continue
+                    # Anything after the marker is commentary we would discard anyway
+                    if stop_after in text:
+                        break
+                
+                if text:
+                    print("Response received successfully!")
+                    return text
+                else:
+                    raise Exception("No response text received from Gemini")
             
-            if response.text:
-                print("Response received successfully!")
-                return response.text
-            else:
-                raise Exception("No response text received from Gemini")
+            def generate():
+                if stop_after:
+                    return generate_streamed()
+                
+                print(f"Sending prompt to Gemini...")
+                response = model.generate_content(prompt)
+                
+                if response.text:
+                    print("Response received successfully!")
+                    return response.text
+                else:
+                    raise Exception("No response text received from Gemini")
+            
+            # Cached prompts are keyed by the requirements they stand in for, not the per-run cache name
+            context = self._cached_content_digests.get(cached_content, cached_content)
+            
+            # Concurrent callers with an identical request wait for the first one's answer
+            request_key = (prompt, context, stop_after)
+            with self._inflight_lock:
+                inflight = self._inflight_prompts.get(request_key)
+                if inflight is None:
+                    self._inflight_prompts[request_key] = owned = Future()
+            if inflight is not None:
+                print("Waiting for identical in-flight prompt...")
+                return inflight.result()
+            
+            try:
+                response = cached_generate(self.model_name, prompt, generate, context, force_refresh, stop_after)
+                owned.set_result(response)
+                return response
+            except Exception as e:
+                owned.set_exception(e)
+                raise
+            finally:
+                with self._inflight_lock:
+                    del self._inflight_prompts[request_key]
                 
         except Exception as e:
             raise Exception(f"Failed to send prompt to Gemini: {e}")
     
+    def generate_batch(self, prompts: List[str], cached_content: Optional[str] = None, return_exceptions: bool = False) -> list:
+        """
+        Send several independent prompts to Gemini in one batch and return the responses in order.
+        
+        Args:
+            prompts (List[str]): Prompts to send
+            cached_content (str, optional): Name of a Gemini cached content shared by all prompts
+            return_exceptions (bool): Return failures in place of their responses instead of raising
+            
+        Returns:
+            list: Gemini's response text for each prompt (or the Exception, with return_exceptions)
+        """
+        if not prompts:
+            return []
+        
+        with ThreadPoolExecutor(max_workers=min(len(prompts), MAX_CONCURRENT_PROMPTS)) as executor:
+            futures = [executor.submit(self.send_prompt, prompt, cached_content) for prompt in prompts]
+        
+        responses = []
+        for future in futures:
+            error = future.exception()
+            if error and not return_exceptions:
+                raise error
+            responses.append(error or future.result())
+        return responses
+    
     def read_srs_file(self, srs_path: str) -> str:
         """
         Read content from an SRS file.
@@ -147,13 +569,14 @@ class UMLDiagramAutomation:
             str: Content of the SRS file
         """
         try:
-            if not os.path.exists(srs_path):
-                raise FileNotFoundError(f"SRS file not found: {srs_path}")
-            
             print(f"Reading SRS file: {srs_path}")
             
-            with open(srs_path, 'r', encoding='utf-8') as file:
-                content = file.read()
+            # Open directly rather than checking exists() first; a missing file raises here
+            try:
+                with open(srs_path, 'r', encoding='utf-8') as file:
+                    content = file.read()
+            except FileNotFoundError:
+                raise FileNotFoundError(f"SRS file not found: {srs_path}")
             
             print(f"Successfully read SRS file ({len(content)} characters)")
             return content
@@ -174,24 +597,7 @@ class UMLDiagramAutomation:
         """
         diagram_name = self.diagram_types.get(diagram_type, "UML Diagram")
         
-        base_prompt = f"""
-You are a senior software architect and UML modeling expert. You need to create a {diagram_name} in PlantUML format based on the provided Software Requirements Specification (SRS).
-
-IMPORTANT INSTRUCTIONS:
-1. Generate ONLY PlantUML code - no explanations, comments, or additional text
-2. Start with @startuml and end with @enduml
-3. Use proper PlantUML syntax for {diagram_type} diagrams
-4. Follow UML best practices and conventions
-5. Make the diagram comprehensive but readable
-6. Use appropriate relationships and stereotypes
-7. Include relevant details from the SRS
-
-SRS CONTENT:
-{srs_content}
-
-Generate a complete {diagram_name} in PlantUML format:
-"""
-        return base_prompt
+        return self._BASE_TMPL.format(diagram_name=diagram_name, diagram_type=diagram_type, srs_content=srs_content)
     
     def generate_structure_class_prompt(self, data_requirements_text: str) -> str:
         """
@@ -203,26 +609,7 @@ Generate a complete {diagram_name} in PlantUML format:
         Returns:
             str: Specialized class diagram prompt
         """
-        prompt = f"""
-Task: Create a Class Diagram based on the following requirements text.
-
-You are a senior software architect. Create a comprehensive Class Diagram in PlantUML format.
-
-Specific Constraints:
-1. Identify the Attributes (fields) and Operations (methods) for each class
-2. Define the Relationships: 
-   - Use --|> for inheritance
-   - Use *-- for composition  
-   - Use o-- for aggregation
-3. Add Multiplicity (e.g., 1..*) to every relationship
-4. Generate ONLY PlantUML code - no explanations
-
-Input Text:
-{data_requirements_text}
-
-Generate PlantUML Class Diagram code:
-"""
-        return prompt
+        return self._STRUCTURE_TMPL.format(data_requirements_text=data_requirements_text)
     
     def generate_interaction_sequence_prompt(self, feature_name: str, functional_requirements_text: str) -> str:
         """
@@ -235,27 +622,7 @@ Generate PlantUML Class Diagram code:
         Returns:
             str: Specialized sequence diagram prompt
         """
-        prompt = f"""
-Task: Create a Sequence Diagram for the "{feature_name}" feature based on the text below.
-
-You are a senior software architect. Create a detailed Sequence Diagram in PlantUML format.
-
-Specific Constraints:
-1. Use autonumber to index the steps
-2. Clearly define participants: 
-   - actor User
-   - participant App  
-   - participant API
-   - database DB
-3. Use alt/else blocks to handle the "Sad Paths" (errors/failures) mentioned in the text
-4. Generate ONLY PlantUML code - no explanations
-
-Input Text:
-{functional_requirements_text}
-
-Generate PlantUML Sequence Diagram code:
-"""
-        return prompt
+        return self._SEQUENCE_TMPL.format(feature_name=feature_name, functional_requirements_text=functional_requirements_text)
     
     def generate_logic_activity_prompt(self, workflow_text: str) -> str:
         """
@@ -267,35 +634,7 @@ Generate PlantUML Sequence Diagram code:
         Returns:
             str: Specialized activity diagram prompt
         """
-        prompt = f"""
-Task: Create an Activity Diagram representing the logic flow of the text below.
-
-You are a senior software architect. Create a comprehensive Activity Diagram in PlantUML format using MODERN PlantUML syntax.
-
-CRITICAL SYNTAX REQUIREMENTS:
-1. Start with: start
-2. End with: stop
-3. Use :Action description; for activities
-4. Use if (condition?) then (yes/no) for decisions with proper endif
-5. Use -> for flow connections
-6. NO old syntax like (*) start or (*) stop
-7. Example structure:
-   start
-   :First Action;
-   if (condition?) then (yes)
-     :Action if true;
-   else (no)
-     :Action if false;
-   endif
-   :Final Action;
-   stop
-
-Input Text (focus on business logic and decision flows):
-{workflow_text}
-
-Generate ONLY valid modern PlantUML Activity Diagram code:
-"""
-        return prompt
+        return self._ACTIVITY_TMPL.format(workflow_text=workflow_text)
     
     def save_puml_file(self, diagram_type: str, puml_content: str, filename: str = None) -> str:
         """
@@ -316,7 +655,8 @@ Generate ONLY valid modern PlantUML Activity Diagram code:
             elif not filename.endswith('.puml'):
                 filename += '.puml'
             
-            file_path = os.path.join(self.diagrams_dir, diagram_type, filename)
+            type_dir = self._type_dirs.get(diagram_type) or os.path.join(self.diagrams_dir, diagram_type)
+            file_path = os.path.join(type_dir, filename)
             
             with open(file_path, 'w', encoding='utf-8') as file:
                 file.write(puml_content)
@@ -354,7 +694,7 @@ Generate ONLY valid modern PlantUML Activity Diagram code:
             
             # Try to generate image with timeout to catch syntax errors
             result = subprocess.run(
-                ['java', '-jar', self.plantuml_jar_path, '-timeout', '10', puml_path],
+                ['java', *PLANTUML_SHORT_RUN_OPTS, '-jar', self.plantuml_jar_path, '-timeout', '10', puml_path],
                 capture_output=True,
                 text=True,
                 timeout=15,  # 15 second timeout
@@ -373,6 +713,79 @@ Generate ONLY valid modern PlantUML Activity Diagram code:
         except Exception as e:
             return False, f"Syntax validation failed: {e}"
     
+    def close_plantuml_pipe(self):
+        """Shut down the persistent PlantUML -pipe process, if one is running."""
+        with self._plantuml_lock:
+            proc, self._plantuml_proc = self._plantuml_proc, None
+        if proc and proc.poll() is None:
+            try:
+                proc.stdin.close()
+                proc.wait(timeout=5)
+            except Exception:
+                proc.kill()
+    
+    def render_png_via_pipe(self, puml_content: str, image_path: str) -> str:
+        """
+        Render PlantUML source to PNG through a long-lived `java -jar plantuml.jar -pipe` process.
+        
+        Reusing one JVM avoids its startup cost on every diagram; renders are serialized
+        through the single process.
+        
+        Args:
+            puml_content (str): PlantUML source (@startuml ... @enduml)
+            image_path (str): Where to write the PNG
+            
+        Returns:
+            str: Path to the generated image file
+        """
+        with self._plantuml_lock:
+            if self._plantuml_proc is None or self._plantuml_proc.poll() is not None:
+                self._plantuml_proc = subprocess.Popen(
+                    # -pipeNoStderr puts syntax errors on stdout ("ERROR", line, message) in place
+                    # of the image, where the check below sees them; otherwise PlantUML would
+                    # emit an error PNG that is indistinguishable from a real render
+                    ["java", *PLANTUML_JAVA_OPTS, "-jar", self.plantuml_jar_path, "-pipe", "-pipeNoStderr",
+                     "-tpng", "-pipedelimitor", PLANTUML_PIPE_DELIMITER.decode()],
+                    stdin=subprocess.PIPE,
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.DEVNULL
+                )
+                # Make sure the JVM goes away with us even without a with-block
+                if not self._plantuml_atexit_registered:
+                    atexit.register(self.close_plantuml_pipe)
+                    self._plantuml_atexit_registered = True
+            proc = self._plantuml_proc
+            
+            # Kill the process if it stops answering, which unblocks the read below
+            watchdog = threading.Timer(PLANTUML_PIPE_TIMEOUT, proc.kill)
+            watchdog.start()
+            try:
+                proc.stdin.write(puml_content.strip().encode('utf-8') + b"\n")
+                proc.stdin.flush()
+                
+                buffer = b""
+                while PLANTUML_PIPE_DELIMITER not in buffer:
+                    chunk = proc.stdout.read1(65536)
+                    if not chunk:
+                        raise Exception("PlantUML pipe closed unexpectedly")
+                    buffer += chunk
+            except Exception:
+                proc.kill()
+                self._plantuml_proc = None
+                raise
+            finally:
+                watchdog.cancel()
+        
+        image_bytes = buffer.split(PLANTUML_PIPE_DELIMITER, 1)[0].lstrip(b"\r\n")
+        if image_bytes.startswith(b"ERROR"):
+            # "ERROR", the failing line number and the message; any error image follows
+            error_lines = image_bytes.split(b"\n", 3)[:3]
+            raise Exception(" ".join(line.decode('utf-8', errors='replace').strip() for line in error_lines))
+        
+        with open(image_path, 'wb') as f:
+            f.write(image_bytes)
+        return image_path
+    
     def generate_image_from_puml(self, puml_file_path: str) -> str:
         """
         Generate an image from a PlantUML file.
@@ -389,30 +802,191 @@ Generate ONLY valid modern PlantUML Activity Diagram code:
             
             print(f"Generating image from: {puml_file_path}")
             
+            with open(puml_file_path, 'r', encoding='utf-8') as f:
+                puml_content = f.read()
+            
+            # Obviously malformed diagrams would only fail inside PlantUML, so reject them here
+            if not _quick_valid_puml(puml_content):
+                raise Exception("PlantUML pre-check failed: missing @startuml/@enduml")
+            
+            image_path = _png_path(puml_file_path)
+            try:
+                self.render_png_via_pipe(puml_content, image_path)
+                _store_render(puml_content, image_path)
+                print(f"Image generated successfully: {image_path}")
+                return image_path
+            except Exception as e:
+                # A syntax error would fail the one-shot run the same way, so report it now
+                if str(e).startswith("ERROR"):
+                    raise Exception(f"PlantUML syntax error: {e}")
+                print(f"⚠️  PlantUML pipe render failed, falling back to one-shot run: {e}")
+            
             # Run PlantUML to generate image with timeout
+            # Pin the format and output directory so the PNG lands exactly at image_path
             result = subprocess.run(
-                ["java", "-jar", self.plantuml_jar_path, puml_file_path],
-                capture_output=True,
+                ["java", *PLANTUML_SHORT_RUN_OPTS, "-jar", self.plantuml_jar_path, "-tpng",
+                 "-o", os.path.dirname(os.path.abspath(puml_file_path)), puml_file_path],
+                stdout=subprocess.DEVNULL,  # only stderr carries anything we inspect
+                stderr=subprocess.PIPE,
                 text=True,
                 timeout=30,  # 30 second timeout
                 check=True
             )
             
-            # Determine output image path
-            base_path = puml_file_path.replace('.puml', '.png')
+            # check=True already raised on a failed render; PlantUML reports other problems on stderr
+            if "ERROR" in result.stderr:
+                raise Exception(f"Image file was not generated: {result.stderr.strip()}")
             
-            if os.path.exists(base_path):
-                print(f"Image generated successfully: {base_path}")
-                return base_path
-            else:
-                raise Exception("Image file was not generated")
+            _store_render(puml_content, image_path)
+            print(f"Image generated successfully: {image_path}")
+            return image_path
                 
         except subprocess.CalledProcessError as e:
             raise Exception(f"PlantUML image generation failed: {e}")
         except Exception as e:
             raise Exception(f"Failed to generate image: {e}")
     
-    def generate_diagram(self, diagram_type: str, srs_content: str, custom_prompt: str = None, filename: str = None) -> Dict[str, str]:
+    def generate_images_batch(self, puml_file_paths: List[str]) -> Dict[str, Optional[str]]:
+        """
+        Render several PlantUML files with a single PlantUML invocation.
+        
+        One JVM renders every file, up to PLANTUML_MAX_BATCH_THREADS at once via -nbthread
+        with the heap sized to match, instead of paying JVM startup per diagram; useful for
+        bulk re-rendering. Files that fail the pre-check or that PlantUML reports a syntax
+        error for map to None, so callers can retry them with generate_image_from_puml to
+        get the error.
+        
+        Args:
+            puml_file_paths (List[str]): Paths to the .puml files
+            
+        Returns:
+            Dict[str, Optional[str]]: Image path for each input path, or None if it was not rendered
+        """
+        if not puml_file_paths:
+            return {}
+        
+        # Same pre-check as generate_image_from_puml; rejected files are left for the per-file path
+        images = {}
+        batch_contents = {}
+        for puml_path in puml_file_paths:
+            try:
+                with open(puml_path, 'r', encoding='utf-8') as f:
+                    puml_content = f.read()
+            except OSError:
+                images[puml_path] = None
+                continue
+            if _quick_valid_puml(puml_content):
+                batch_contents[puml_path] = puml_content
+            else:
+                images[puml_path] = None
+        batch_paths = list(batch_contents)
+        
+        if batch_paths:
+            threads = min(len(batch_paths), os.cpu_count() or 1, PLANTUML_MAX_BATCH_THREADS)
+            started = datetime.datetime.now().timestamp()
+            try:
+                result = subprocess.run(
+                    ["java", *_plantuml_short_run_opts(threads), "-jar", self.plantuml_jar_path, "-tpng",
+                     "-nbthread", str(threads), *batch_paths],
+                    stdout=subprocess.DEVNULL,  # results are read from the written PNGs
+                    stderr=subprocess.PIPE,     # syntax errors are only reported here
+                    text=True,
+                    errors='replace',
+                    timeout=30 + 5 * len(batch_paths)
+                )
+            except subprocess.TimeoutExpired as e:
+                raise Exception(f"PlantUML batch render timed out: {e}")
+            
+            # PlantUML still writes an error image for a diagram with a syntax error,
+            # so the files it names on stderr must not count as rendered
+            failed = _plantuml_error_files(result.stderr, batch_paths)
+            if result.returncode != 0 and not failed:
+                # A failure PlantUML did not attribute to a file: trust none of the outputs
+                print(f"⚠️  PlantUML batch exited with code {result.returncode}: {result.stderr.strip()[:500]}")
+                failed = set(batch_paths)
+            for puml_path in batch_paths:
+                image_path = _png_path(puml_path)
+                try:
+                    rendered = puml_path not in failed and os.stat(image_path).st_mtime >= started - 1
+                except FileNotFoundError:
+                    rendered = False
+                images[puml_path] = image_path if rendered else None
+                if rendered:
+                    _store_render(batch_contents[puml_path], image_path)
+        
+        return {puml_path: images[puml_path] for puml_path in puml_file_paths}
+    
+    def render_diagram_results(self, results: Dict[str, Dict[str, str]]) -> Dict[str, Dict[str, str]]:
+        """
+        Render every saved but not yet rendered diagram in results with one PlantUML run.
+        
+        Diagrams the batch run could not render (including those PlantUML reported a
+        syntax error for, see generate_images_batch) are retried individually so their
+        error is recorded; those entries are replaced by {'error': ..., 'puml': path}
+        and the error image PlantUML leaves behind is removed.
+        
+        Args:
+            results (Dict[str, Dict[str, str]]): Diagram results as returned with render=False
+            
+        Returns:
+            Dict[str, Dict[str, str]]: The same results with 'image' paths filled in
+        """
+        pending = {key: info['puml'] for key, info in results.items()
+                   if isinstance(info, dict) and info.get('puml') and not info.get('image') and 'error' not in info}
+        if not pending:
+            return results
+        
+        print(f"\n🖼️  Rendering {len(pending)} diagram(s) in one PlantUML run...")
+        try:
+            images = self.generate_images_batch(list(pending.values()))
+        except Exception as e:
+            print(f"⚠️  Batch render failed, rendering diagrams one by one: {e}")
+            images = {}
+        
+        for key, puml_path in pending.items():
+            image_path = images.get(puml_path)
+            if image_path is None:
+                try:
+                    image_path = self.generate_image_from_puml(puml_path)
+                except Exception as e:
+                    print(f"❌ Failed to render {puml_path}: {e}")
+                    results[key] = {'error': str(e), 'puml': puml_path}
+                    # Do not leave PlantUML's error image where a rendered diagram is expected
+                    try:
+                        os.remove(_png_path(puml_path))
+                    except FileNotFoundError:
+                        pass
+                    continue
+            results[key]['image'] = image_path
+        
+        return results
+    
+    def generate_image_cached(self, puml_file_path: str, puml_content: str) -> str:
+        """
+        Generate an image from a PlantUML file, reusing a previous render of identical content.
+        
+        Args:
+            puml_file_path (str): Path to the .puml file
+            puml_content (str): PlantUML source saved at puml_file_path
+            
+        Returns:
+            str: Path to the generated image file
+        """
+        if not _quick_valid_puml(puml_content):
+            raise Exception("Failed to generate image: PlantUML pre-check failed: missing @startuml/@enduml")
+        
+        cached_image = _render_cache_path(puml_content)
+        image_path = _png_path(puml_file_path)
+        
+        if os.path.exists(cached_image):
+            shutil.copyfile(cached_image, image_path)
+            print(f"Image reused from render cache: {image_path}")
+            return image_path
+        
+        # Every successful render (including the initial, uncached ones) adds itself to the cache
+        return self.generate_image_from_puml(puml_file_path)
+    
+    def generate_diagram(self, diagram_type: str, srs_content: str, custom_prompt: str = None, filename: str = None, render: bool = True, cached_content: str = None) -> Dict[str, str]:
         """
         Generate a complete UML diagram (PUML file + image).
         
@@ -421,6 +995,9 @@ Generate ONLY valid modern PlantUML Activity Diagram code:
             srs_content (str): SRS content
             custom_prompt (str, optional): Custom prompt additions
             filename (str, optional): Custom filename
+            render (bool): Render the image now; when False 'image' is None and
+                           the caller renders later (see render_diagram_results)
+            cached_content (str, optional): Gemini cached content holding the SRS
             
         Returns:
             Dict[str, str]: Paths to generated files {'puml': path, 'image': path}
@@ -429,14 +1006,16 @@ Generate ONLY valid modern PlantUML Activity Diagram code:
             if diagram_type not in self.diagram_types:
                 raise ValueError(f"Unsupported diagram type: {diagram_type}")
             
-            # Generate prompt
+            # Generate prompt (the SRS itself is already in the model context when cached;
+            # otherwise large documents are cut down to the sections this type needs)
+            srs_text = CACHED_REQUIREMENTS_REFERENCE if cached_content else _select_srs_sections(diagram_type, srs_content)
             if custom_prompt:
-                prompt = custom_prompt.replace("{srs_content}", srs_content)
+                prompt = custom_prompt.replace("{srs_content}", srs_text)
             else:
-                prompt = self.generate_base_prompt(diagram_type, srs_content)
+                prompt = self.generate_base_prompt(diagram_type, srs_text)
             
             # Get PlantUML code from Gemini
-            puml_content = self.send_prompt(prompt)
+            puml_content = self.send_prompt(prompt, cached_content, stop_after="@enduml")
             
             # Clean up the response to extract only PlantUML code
             puml_content = self.extract_plantuml_code(puml_content)
@@ -445,7 +1024,7 @@ Generate ONLY valid modern PlantUML Activity Diagram code:
             puml_path = self.save_puml_file(diagram_type, puml_content, filename)
             
             # Generate image
-            image_path = self.generate_image_from_puml(puml_path)
+            image_path = self.generate_image_from_puml(puml_path) if render else None
             
             return {
                 'puml': puml_path,
@@ -467,29 +1046,13 @@ Generate ONLY valid modern PlantUML Activity Diagram code:
             str: Cleaned PlantUML code
         """
         try:
-            # Look for @startuml and @enduml markers
-            start_marker = "@startuml"
-            end_marker = "@enduml"
-            
-            start_index = response.find(start_marker)
-            end_index = response.find(end_marker)
-            
-            if start_index != -1 and end_index != -1:
-                # Extract content between markers (inclusive)
-                puml_content = response[start_index:end_index + len(end_marker)]
-                return puml_content.strip()
+            # Look for a complete @startuml ... @enduml block (markers inclusive)
+            match = PLANTUML_BLOCK_RE.search(response)
+            if match:
+                return match.group().strip()
             else:
-                # If markers not found, try to clean the response
-                lines = response.strip().split('\n')
-                cleaned_lines = []
-                
-                for line in lines:
-                    # Skip markdown code block markers
-                    if line.strip().startswith('```'):
-                        continue
-                    cleaned_lines.append(line)
-                
-                cleaned_content = '\n'.join(cleaned_lines).strip()
+                # If markers not found, strip markdown code block markers from the response
+                cleaned_content = CODE_FENCE_LINE_RE.sub('', response.strip()).strip()
                 
                 # Add markers if missing
                 if not cleaned_content.startswith('@startuml'):
@@ -512,13 +1075,13 @@ Generate ONLY valid modern PlantUML Activity Diagram code:
         diagrams = {}
         
         try:
-            for diagram_type in self.diagram_types.keys():
-                type_dir = os.path.join(self.diagrams_dir, diagram_type)
-                if os.path.exists(type_dir):
-                    files = [f for f in os.listdir(type_dir) if f.endswith(('.puml', '.png'))]
-                    diagrams[diagram_type] = sorted(files)
-                else:
-                    diagrams[diagram_type] = []
+            for diagram_type, type_dir in self._type_dirs.items():
+                try:
+                    with os.scandir(type_dir) as entries:
+                        files = sorted(entry.name for entry in entries if entry.name.endswith(('.puml', '.png')))
+                except FileNotFoundError:
+                    files = []
+                diagrams[diagram_type] = files
             
             return diagrams
             
@@ -537,39 +1100,56 @@ Generate ONLY valid modern PlantUML Activity Diagram code:
             Dict[str, Dict[str, str]]: Results for each diagram type
         """
         if not selected_types:
-            selected_types = list(self.diagram_types.keys())
+            selected_types = DIAGRAM_TYPE_KEYS
         
         results = {}
         
-        for diagram_type in selected_types:
-            try:
-                print(f"\n=== Generating {self.diagram_types[diagram_type]} ===")
-                result = self.generate_diagram(diagram_type, srs_content)
-                results[diagram_type] = result
-                print(f"✅ {self.diagram_types[diagram_type]} completed successfully!")
+        # Every prompt shares the full SRS, so upload it once as a cached prefix
+        cache_name = self.create_requirements_cache(srs_content) if len(selected_types) > 1 else None
+        try:
+            # Request every PlantUML source concurrently, then render them in one JVM run
+            type_label = DIAGRAM_TYPES.get
+            with ThreadPoolExecutor(max_workers=MAX_CONCURRENT_PROMPTS) as executor:
+                futures = {}
+                for diagram_type in selected_types:
+                    print(f"\n=== Generating {type_label(diagram_type, diagram_type)} ===")
+                    futures[diagram_type] = executor.submit(
+                        self.generate_diagram, diagram_type, srs_content, render=False, cached_content=cache_name
+                    )
                 
-            except Exception as e:
-                print(f"❌ Failed to generate {self.diagram_types[diagram_type]}: {e}")
-                results[diagram_type] = {'error': str(e)}
+                for diagram_type, future in futures.items():
+                    label = type_label(diagram_type, diagram_type)
+                    try:
+                        results[diagram_type] = future.result()
+                        print(f"✅ {label} PlantUML generated!")
+                    except Exception as e:
+                        print(f"❌ Failed to generate {label}: {e}")
+                        results[diagram_type] = {'error': str(e)}
+        finally:
+            self.delete_requirements_cache(cache_name)
         
-        return results
+        return self.render_diagram_results(results)
     
-    def generate_structure_diagram(self, data_requirements_text: str, filename: str = None) -> Dict[str, str]:
+    def generate_structure_diagram(self, data_requirements_text: str, filename: str = None, cached_content: str = None, render: bool = True) -> Dict[str, str]:
         """
         Generate a Structure (Class) Diagram based on Data Requirements/Entities.
         
         Args:
             data_requirements_text (str): Text containing data requirements or entities
             filename (str, optional): Custom filename
+            cached_content (str, optional): Gemini cached content holding the requirements
+            render (bool): Render the image now; when False 'image' is None
             
         Returns:
             Dict[str, str]: Paths to generated files
         """
         try:
-            prompt = self.generate_structure_class_prompt(data_requirements_text)
+            prompt = self.generate_structure_class_prompt(
+                CACHED_REQUIREMENTS_REFERENCE if cached_content else data_requirements_text
+            )
             
             # Get PlantUML code from Gemini
-            puml_content = self.send_prompt(prompt)
+            puml_content = self.send_prompt(prompt, cached_content, stop_after="@enduml")
             
             # Clean up the response
             puml_content = self.extract_plantuml_code(puml_content)
@@ -580,7 +1160,7 @@ Generate ONLY valid modern PlantUML Activity Diagram code:
             puml_path = self.save_puml_file("class", puml_content, filename)
             
             # Generate image
-            image_path = self.generate_image_from_puml(puml_path)
+            image_path = self.generate_image_from_puml(puml_path) if render else None
             
             return {
                 'puml': puml_path,
@@ -591,7 +1171,7 @@ Generate ONLY valid modern PlantUML Activity Diagram code:
         except Exception as e:
             raise Exception(f"Failed to generate structure diagram: {e}")
     
-    def generate_interaction_diagram(self, feature_name: str, functional_requirements_text: str, filename: str = None) -> Dict[str, str]:
+    def generate_interaction_diagram(self, feature_name: str, functional_requirements_text: str, filename: str = None, cached_content: str = None, render: bool = True) -> Dict[str, str]:
         """
         Generate an Interaction (Sequence) Diagram based on Functional Requirements.
         
@@ -599,15 +1179,20 @@ Generate ONLY valid modern PlantUML Activity Diagram code:
             feature_name (str): Name of the feature to model
             functional_requirements_text (str): Text containing functional requirements
             filename (str, optional): Custom filename
+            cached_content (str, optional): Gemini cached content holding the requirements
+            render (bool): Render the image now; when False 'image' is None
             
         Returns:
             Dict[str, str]: Paths to generated files
         """
         try:
-            prompt = self.generate_interaction_sequence_prompt(feature_name, functional_requirements_text)
+            prompt = self.generate_interaction_sequence_prompt(
+                feature_name,
+                CACHED_REQUIREMENTS_REFERENCE if cached_content else functional_requirements_text
+            )
             
             # Get PlantUML code from Gemini
-            puml_content = self.send_prompt(prompt)
+            puml_content = self.send_prompt(prompt, cached_content, stop_after="@enduml")
             
             # Clean up the response
             puml_content = self.extract_plantuml_code(puml_content)
@@ -618,7 +1203,7 @@ Generate ONLY valid modern PlantUML Activity Diagram code:
             puml_path = self.save_puml_file("sequence", puml_content, filename)
             
             # Generate image
-            image_path = self.generate_image_from_puml(puml_path)
+            image_path = self.generate_image_from_puml(puml_path) if render else None
             
             return {
                 'puml': puml_path,
@@ -629,7 +1214,7 @@ Generate ONLY valid modern PlantUML Activity Diagram code:
         except Exception as e:
             raise Exception(f"Failed to generate interaction diagram for {feature_name}: {e}")
     
-    def generate_logic_diagram(self, workflow_text: str, workflow_name: str = "Logic Flow", filename: str = None) -> Dict[str, str]:
+    def generate_logic_diagram(self, workflow_text: str, workflow_name: str = "Logic Flow", filename: str = None, cached_content: str = None, render: bool = True) -> Dict[str, str]:
         """
         Generate a Logic (Activity) Diagram for complex workflows with decisions.
         
@@ -637,15 +1222,19 @@ Generate ONLY valid modern PlantUML Activity Diagram code:
             workflow_text (str): Text containing workflow logic and decision points
             workflow_name (str): Name of the workflow for documentation
             filename (str, optional): Custom filename
+            cached_content (str, optional): Gemini cached content holding the requirements
+            render (bool): Render the image now; when False 'image' is None
             
         Returns:
             Dict[str, str]: Paths to generated files
         """
         try:
-            prompt = self.generate_logic_activity_prompt(workflow_text)
+            prompt = self.generate_logic_activity_prompt(
+                CACHED_REQUIREMENTS_REFERENCE if cached_content else workflow_text
+            )
             
             # Get PlantUML code from Gemini
-            puml_content = self.send_prompt(prompt)
+            puml_content = self.send_prompt(prompt, cached_content, stop_after="@enduml")
             
             # Clean up the response
             puml_content = self.extract_plantuml_code(puml_content)
@@ -656,7 +1245,7 @@ Generate ONLY valid modern PlantUML Activity Diagram code:
             puml_path = self.save_puml_file("activity", puml_content, filename)
             
             # Generate image
-            image_path = self.generate_image_from_puml(puml_path)
+            image_path = self.generate_image_from_puml(puml_path) if render else None
             
             return {
                 'puml': puml_path,
@@ -684,67 +1273,66 @@ Generate ONLY valid modern PlantUML Activity Diagram code:
             # Note: These would need to be customized based on actual SRS structure
             print("🔍 Analyzing SRS content for diagram generation...")
             
+            # (result key, label, generator, args) for every diagram the SRS supports
+            jobs = []
+            
+            # Locate the first occurrence of every section marker in one pass over the SRS
+            section_starts = _srs_section_starts(srs_content)
+            
             # Structure Diagram - Data Requirements section
-            if "3.6 Data Requirements" in srs_content:
-                data_section_start = srs_content.find("3.6 Data Requirements")
-                data_section_end = srs_content.find("**4.", data_section_start)
-                if data_section_end == -1:
-                    data_section_end = len(srs_content)
-                data_requirements = srs_content[data_section_start:data_section_end]
+            if DATA_REQUIREMENTS_MARKER in section_starts:
+                data_requirements = _srs_section(srs_content, DATA_REQUIREMENTS_MARKER,
+                                                 section_starts[DATA_REQUIREMENTS_MARKER])
                 
-                print("\n=== Generating Structure (Class) Diagram ===")
-                structure_result = self.generate_structure_diagram(
-                    data_requirements, 
-                    "electric_car_app_structure"
-                )
-                results['structure'] = structure_result
-                print(f"✅ Structure diagram completed!")
+                jobs.append(('structure', "Structure (Class) Diagram", self.generate_structure_diagram,
+                             (data_requirements, "electric_car_app_structure")))
             
             # Interaction Diagrams - Key functional requirements
-            functional_features = [
-                ("Vehicle Monitoring", "VM-1"),
-                ("Charging Management", "CM-1"),
-                ("Vehicle Control", "VC-1"),
-                ("Trip Planning", "TP-1")
-            ]
-            
-            for feature_name, feature_code in functional_features:
-                if feature_code in srs_content:
-                    print(f"\n=== Generating Interaction Diagram: {feature_name} ===")
-                    
+            for feature_name, feature_code in FUNCTIONAL_FEATURES:
+                if feature_code in section_starts:
                     # Extract feature section
-                    feature_start = srs_content.find(feature_code)
-                    feature_end = srs_content.find("\n    *", feature_start + 100)  # Next major section
-                    if feature_end == -1:
-                        feature_end = feature_start + 2000  # Reasonable default
+                    feature_text = _srs_section(srs_content, feature_code, section_starts[feature_code])
+                    feature_key = feature_name.lower().replace(' ', '_')
                     
-                    feature_text = srs_content[feature_start:feature_end]
-                    
-                    interaction_result = self.generate_interaction_diagram(
-                        feature_name, 
-                        feature_text,
-                        f"interaction_{feature_name.lower().replace(' ', '_')}"
-                    )
-                    results[f'interaction_{feature_name.lower().replace(" ", "_")}'] = interaction_result
-                    print(f"✅ {feature_name} interaction diagram completed!")
+                    jobs.append((f'interaction_{feature_key}', f"Interaction Diagram: {feature_name}",
+                                 self.generate_interaction_diagram,
+                                 (feature_name, feature_text, f"interaction_{feature_key}")))
             
             # Logic Diagram - Error handling and complex workflows
-            if "Error Handling" in srs_content:
-                error_start = srs_content.find("Error Handling")
-                error_end = srs_content.find("**", error_start + 100)
-                if error_end == -1:
-                    error_end = error_start + 1000
+            if ERROR_HANDLING_MARKER in section_starts:
+                error_text = _srs_section(srs_content, ERROR_HANDLING_MARKER, section_starts[ERROR_HANDLING_MARKER])
                 
-                error_text = srs_content[error_start:error_end]
+                jobs.append(('logic_error_handling', "Logic (Activity) Diagram: Error Handling",
+                             self.generate_logic_diagram,
+                             (error_text, "Error Handling Workflow", "logic_error_handling")))
+            
+            # Request the PlantUML sources concurrently; the first failure aborts the set as before
+            first_error = None
+            with ThreadPoolExecutor(max_workers=MAX_CONCURRENT_PROMPTS) as executor:
+                futures = []
+                for key, label, generator, args in jobs:
+                    print(f"\n=== Generating {label} ===")
+                    futures.append((key, label, executor.submit(generator, *args, render=False)))
                 
-                print("\n=== Generating Logic (Activity) Diagram: Error Handling ===")
-                logic_result = self.generate_logic_diagram(
-                    error_text, 
-                    "Error Handling Workflow",
-                    "logic_error_handling"
-                )
-                results['logic_error_handling'] = logic_result
-                print(f"✅ Error handling logic diagram completed!")
+                for key, label, future in futures:
+                    if future.cancelled():
+                        continue
+                    try:
+                        results[key] = future.result()
+                        print(f"✅ {label} completed!")
+                    except Exception as e:
+                        print(f"❌ {label} failed: {e}")
+                        if first_error is None:
+                            first_error = e
+                            # Jobs that have not started would only spend Gemini calls on an aborted set
+                            for _, _, pending in futures:
+                                pending.cancel()
+            
+            # The PlantUML sources generated so far are saved; render them together in one JVM run,
+            # also when the set was aborted, so finished diagrams are not thrown away
+            self.render_diagram_results(results)
+            if first_error is not None:
+                raise first_error
             
             print(f"\n🎉 Comprehensive design set generation completed!")
             print(f"Generated {len(results)} specialized diagrams")
@@ -755,7 +1343,41 @@ Generate ONLY valid modern PlantUML Activity Diagram code:
         
         return results
     
-    def generate_diagrams_from_requirements_slice(self, requirements_slice: str, slice_name: str = "RequirementSlice", custom_validation_prompt: str = None) -> Dict[str, any]:
+    def generate_diagrams_parallel(self, requirements_slice: str, slice_name: str, cached_content: str = None, file_prefix: str = None) -> Dict[str, Dict[str, str]]:
+        """
+        Generate the Class, Sequence and Activity diagrams for a slice concurrently.
+        
+        Args:
+            requirements_slice (str): Slice of requirements to process
+            slice_name (str): Name identifier for this slice
+            cached_content (str, optional): Gemini cached content holding the requirements
+            file_prefix (str, optional): Prefix for the diagram filenames (default: slice_name)
+            
+        Returns:
+            Dict[str, Dict[str, str]]: Diagram info (or {'error': ...}) keyed by diagram type
+        """
+        file_prefix = file_prefix or slice_name
+        diagram_calls = {
+            'class': (self.generate_structure_diagram, requirements_slice, f"{file_prefix}_class_diagram", cached_content),
+            'sequence': (self.generate_interaction_diagram, f"{slice_name} Interactions", requirements_slice, f"{file_prefix}_sequence_diagram", cached_content),
+            'activity': (self.generate_logic_diagram, requirements_slice, f"{slice_name} Workflow", f"{file_prefix}_activity_diagram", cached_content)
+        }
+        
+        diagrams = {}
+        with ThreadPoolExecutor(max_workers=len(diagram_calls)) as executor:
+            futures = {diagram_type: executor.submit(*call) for diagram_type, call in diagram_calls.items()}
+            for diagram_type, future in futures.items():
+                label = self.diagram_types[diagram_type]
+                try:
+                    diagrams[diagram_type] = future.result()
+                    print(f"✅ {label}: {diagrams[diagram_type]['image']}")
+                except Exception as e:
+                    print(f"❌ {label} failed: {e}")
+                    diagrams[diagram_type] = {'error': str(e)}
+        
+        return diagrams
+    
+    def generate_diagrams_from_requirements_slice(self, requirements_slice: str, slice_name: str = "RequirementSlice", custom_validation_prompt: str = None, cached_content: str = None) -> Dict[str, any]:
         """
         Generate the core 3 diagrams (Class, Sequence, Activity) from a requirements slice and validate consistency.
         
@@ -763,6 +1385,7 @@ Generate ONLY valid modern PlantUML Activity Diagram code:
             requirements_slice (str): Slice of requirements to process
             slice_name (str): Name identifier for this slice
             custom_validation_prompt (str, optional): Custom prompt for validation phase
+            cached_content (str, optional): Gemini cached content holding the requirements
             
         Returns:
             Dict containing diagram results and validation report
@@ -778,87 +1401,162 @@ Generate ONLY valid modern PlantUML Activity Diagram code:
         
         try:
             # =================================================================
-            # PHASE 1: Generate the 3 Core Diagrams
+            # PHASE 1: Generate the 3 Core Diagrams (concurrently)
             # =================================================================
             
-            print(f"\n📊 Generating Class Diagram for {slice_name}...")
-            try:
-                class_result = self.generate_structure_diagram(
-                    requirements_slice,
-                    f"{slice_name}_class_diagram"
-                )
-                iteration_results['diagrams']['class'] = class_result
-                print(f"✅ Class Diagram: {class_result['image']}")
-            except Exception as e:
-                print(f"❌ Class Diagram failed: {e}")
-                iteration_results['diagrams']['class'] = {'error': str(e)}
+            print(f"\n📊 Generating Class, Sequence and Activity Diagrams for {slice_name}...")
+            iteration_results['diagrams'] = self.generate_diagrams_parallel(requirements_slice, slice_name, cached_content)
+            
+            if 'error' in iteration_results['diagrams']['class']:
                 print(f"🛑 Stopping iteration due to Class Diagram failure")
                 return iteration_results
 
-            print(f"\n🔄 Generating Sequence Diagram for {slice_name}...")
-            try:
-                sequence_result = self.generate_interaction_diagram(
-                    f"{slice_name} Interactions",
-                    requirements_slice,
-                    f"{slice_name}_sequence_diagram"
-                )
-                iteration_results['diagrams']['sequence'] = sequence_result
-                print(f"✅ Sequence Diagram: {sequence_result['image']}")
-            except Exception as e:
-                print(f"❌ Sequence Diagram failed: {e}")
-                iteration_results['diagrams']['sequence'] = {'error': str(e)}
-
-            print(f"\n🔀 Generating Activity Diagram for {slice_name}...")
-            try:
-                activity_result = self.generate_logic_diagram(
-                    requirements_slice,
-                    f"{slice_name} Workflow",
-                    f"{slice_name}_activity_diagram"
-                )
-                iteration_results['diagrams']['activity'] = activity_result
-                print(f"✅ Activity Diagram: {activity_result['image']}")
-            except Exception as e:
-                print(f"❌ Activity Diagram failed: {e}")
-                iteration_results['diagrams']['activity'] = {'error': str(e)}
-
             # =================================================================
             # PHASE 2: Validate Consistency
             # =================================================================
             
-            print(f"\n🔍 Validating consistency between diagrams and requirements...")
-            validation_result = self.validate_diagram_consistency(
-                requirements_slice,
-                iteration_results['diagrams'],
-                slice_name,
-                custom_validation_prompt
-            )
-            iteration_results['validation'] = validation_result
+            self._validate_slice_diagrams(iteration_results, requirements_slice, slice_name, custom_validation_prompt, cached_content)
+            
+        except Exception as e:
+            print(f"❌ Iteration failed: {e}")
+            iteration_results['error'] = str(e)
             
-            # Enhanced validation summary with penalty information
-            score = validation_result.get('consistency_score', 'N/A')
-            metrics = validation_result.get('metrics', {})
-            penalties = metrics.get('penalties_applied')
+        return iteration_results
+
+    def _validate_slice_diagrams(self, iteration_results: Dict[str, any], requirements_slice: str, slice_name: str, custom_validation_prompt: str = None, cached_content: str = None):
+        """
+        Validate a slice's generated diagrams and store the result in iteration_results['validation'].
+        
+        Args:
+            iteration_results (dict): Slice results holding the generated 'diagrams'
+            requirements_slice (str): Slice of requirements the diagrams were generated from
+            slice_name (str): Name identifier for this slice
+            custom_validation_prompt (str, optional): Custom prompt for validation phase
+            cached_content (str, optional): Gemini cached content holding the requirements
+        """
+        print(f"\n🔍 Validating consistency between diagrams and requirements...")
+        validation_result = self.validate_diagram_consistency(
+            requirements_slice,
+            iteration_results['diagrams'],
+            slice_name,
+            custom_validation_prompt,
+            cached_content
+        )
+        iteration_results['validation'] = validation_result
+        
+        # Enhanced validation summary with penalty information
+        score = validation_result.get('consistency_score', 'N/A')
+        metrics = validation_result.get('metrics', {})
+        penalties = metrics.get('penalties_applied')
+        
+        if penalties:
+            original_score = metrics.get('original_overall_score', 'N/A')
+            penalty_total = penalties.get('total_penalty', 0)
+            print(f"\n✅ Validation Complete. Score: {score}/10 (Original: {original_score}/10, Penalties: -{penalty_total})")
+            
+            # Show penalty details
+            penalty_notes = penalties.get('penalty_notes', [])
+            if penalty_notes:
+                print("📋 Penalty Details:")
+                for note in penalty_notes:
+                    print(f"  - {note}")
+        else:
+            print(f"\n✅ Validation Complete. Score: {score}/10")
+    
+    def iter_slice_results(self, slices, custom_validation_prompt: str = None, prefetch: int = 2):
+        """
+        Pipeline slices through generation and validation, yielding each slice's results in order.
+        
+        Diagrams for the next `prefetch` slices are generated in the background while the
+        current slice is being validated.
+        
+        Args:
+            slices (Iterable[Tuple[str, str]]): (slice_name, requirements_slice) pairs
+            custom_validation_prompt (str, optional): Custom prompt for validation phase
+            prefetch (int): Number of slices whose diagrams are generated ahead
             
-            if penalties:
-                original_score = metrics.get('original_overall_score', 'N/A')
-                penalty_total = penalties.get('total_penalty', 0)
-                print(f"\n✅ Validation Complete. Score: {score}/10 (Original: {original_score}/10, Penalties: -{penalty_total})")
+        Yields:
+            Dict containing diagram results and validation report, as from
+            generate_diagrams_from_requirements_slice
+        """
+        slice_iter = iter(slices)
+        pending = deque()
+        
+        with ThreadPoolExecutor(max_workers=prefetch) as executor:
+            def submit_next():
+                for slice_name, requirements_slice in slice_iter:
+                    future = executor.submit(self.generate_diagrams_parallel, requirements_slice, slice_name)
+                    pending.append((slice_name, requirements_slice, future))
+                    return
+            
+            for _ in range(prefetch):
+                submit_next()
+            
+            while pending:
+                slice_name, requirements_slice, future = pending.popleft()
+                submit_next()
                 
-                # Show penalty details
-                penalty_notes = penalties.get('penalty_notes', [])
-                if penalty_notes:
-                    print("📋 Penalty Details:")
-                    for note in penalty_notes:
-                        print(f"  - {note}")
-            else:
-                print(f"\n✅ Validation Complete. Score: {score}/10")
+                iteration_results = {
+                    'slice_name': slice_name,
+                    'diagrams': future.result(),
+                    'validation': None,
+                    'timestamp': datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+                }
+                
+                if 'error' in iteration_results['diagrams']['class']:
+                    print(f"🛑 Stopping {slice_name} due to Class Diagram failure")
+                else:
+                    try:
+                        self._validate_slice_diagrams(iteration_results, requirements_slice, slice_name, custom_validation_prompt)
+                    except Exception as e:
+                        print(f"❌ Iteration failed: {e}")
+                        iteration_results['error'] = str(e)
+                
+                yield iteration_results
+    
+    async def async_generate_diagrams_from_requirements_slice(self, requirements_slice: str, slice_name: str = "RequirementSlice", custom_validation_prompt: str = None, cached_content: str = None) -> Dict[str, any]:
+        """
+        Async variant of generate_diagrams_from_requirements_slice that generates the 3 core diagrams concurrently.
+        
+        The SDK and PlantUML calls are blocking, so the diagrams are generated off the event loop.
+        
+        Args:
+            requirements_slice (str): Slice of requirements to process
+            slice_name (str): Name identifier for this slice
+            custom_validation_prompt (str, optional): Custom prompt for validation phase
+            cached_content (str, optional): Gemini cached content holding the requirements
             
+        Returns:
+            Dict containing diagram results and validation report
+        """
+        print(f"🚀 Starting concurrent design generation for: {slice_name}")
+        
+        iteration_results = {
+            'slice_name': slice_name,
+            'diagrams': {},
+            'validation': None,
+            'timestamp': datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+        }
+        
+        iteration_results['diagrams'] = await asyncio.to_thread(
+            self.generate_diagrams_parallel, requirements_slice, slice_name, cached_content
+        )
+        
+        if 'error' in iteration_results['diagrams']['class']:
+            print(f"🛑 Stopping iteration due to Class Diagram failure")
+            return iteration_results
+        
+        try:
+            await asyncio.to_thread(
+                self._validate_slice_diagrams,
+                iteration_results, requirements_slice, slice_name, custom_validation_prompt, cached_content
+            )
         except Exception as e:
             print(f"❌ Iteration failed: {e}")
             iteration_results['error'] = str(e)
-            
+        
         return iteration_results
-
+    
     def generate_default_validation_prompt(self, requirements: str, diagram_contents: Dict[str, str], slice_name: str) -> str:
         """
         Generate the default validation prompt for diagram consistency checking.
@@ -965,7 +1663,7 @@ Ensure the output is valid JSON. Do not include markdown formatting (like ```jso
                 "error": str(e)
             }
 
-    def validate_diagram_consistency(self, requirements_slice: str, diagrams: Dict[str, Dict], slice_name: str, custom_validation_prompt: str = None) -> Dict[str, any]:
+    def validate_diagram_consistency(self, requirements_slice: str, diagrams: Dict[str, Dict], slice_name: str, custom_validation_prompt: str = None, cached_content: str = None) -> Dict[str, any]:
         """
         Validate the consistency between the three generated diagrams and the requirements.
         
@@ -974,6 +1672,7 @@ Ensure the output is valid JSON. Do not include markdown formatting (like ```jso
             diagrams (Dict): Generated diagram information
             slice_name (str): Name of the requirements slice
             custom_validation_prompt (str, optional): Custom validation prompt
+            cached_content (str, optional): Gemini cached content holding the requirements
             
         Returns:
             Dict containing validation results and consistency report
@@ -1004,10 +1703,13 @@ Ensure the output is valid JSON. Do not include markdown formatting (like ```jso
             
             print(f"  📊 Validating {len(diagram_contents)} diagrams: {list(diagram_contents.keys())}")
             
+            # Requirements already live in the cached context, don't send them again
+            prompt_requirements = CACHED_REQUIREMENTS_REFERENCE if cached_content else requirements_slice
+            
             # Generate validation prompt
             if custom_validation_prompt:
                 validation_prompt = custom_validation_prompt.format(
-                    requirements=requirements_slice,
+                    requirements=prompt_requirements,
                     class_diagram=diagram_contents.get('class', 'Not generated'),
                     sequence_diagram=diagram_contents.get('sequence', 'Not generated'),
                     activity_diagram=diagram_contents.get('activity', 'Not generated'),
@@ -1015,11 +1717,11 @@ Ensure the output is valid JSON. Do not include markdown formatting (like ```jso
                 )
             else:
                 validation_prompt = self.generate_default_validation_prompt(
-                    requirements_slice, diagram_contents, slice_name
+                    prompt_requirements, diagram_contents, slice_name
                 )
             
             # Get validation report from Gemini
-            validation_report = self.send_prompt(validation_prompt)
+            validation_report = self.send_prompt(validation_prompt, cached_content)
             
             # Extract metrics from Gemini response
             metrics = self.extract_validation_metrics(validation_report)
@@ -1153,8 +1855,7 @@ Ensure the output is valid JSON. Do not include markdown formatting (like ```jso
             
             # Setup directories
             self.setup_directories()
-            if not os.path.exists(output_dir):
-                os.makedirs(output_dir)
+            os.makedirs(output_dir, exist_ok=True)
             
             # Initialize Gemini
             self.setup_gemini()
@@ -1174,14 +1875,9 @@ Ensure the output is valid JSON. Do not include markdown formatting (like ```jso
                 }
             ]
             
-            all_results = []
-            
-            for req_slice in slices:
-                result = self.generate_diagrams_from_requirements_slice(
-                    req_slice['requirements'],
-                    req_slice['name']
-                )
-                all_results.append(result)
+            all_results = list(self.iter_slice_results(
+                (req_slice['name'], req_slice['requirements']) for req_slice in slices
+            ))
                 
             # Save summary
             self.save_workflow_summary_report(all_results)
@@ -1273,7 +1969,7 @@ Generate the improved {diagram_name} Diagram now:
 """
         return prompt
 
-    def refine_diagram_with_feedback(self, diagram_type: str, requirements: str, current_diagram_info: dict, qa_metrics: dict, slice_name: str, iteration_num: int) -> dict:
+    def refine_diagram_with_feedback(self, diagram_type: str, requirements: str, current_diagram_info: dict, qa_metrics: dict, slice_name: str, iteration_num: int, cached_content: str = None) -> dict:
         """
         Refine a single diagram based on QA feedback.
         
@@ -1284,28 +1980,32 @@ Generate the improved {diagram_name} Diagram now:
             qa_metrics (dict): QA validation metrics
             slice_name (str): Name of the requirements slice
             iteration_num (int): Current iteration number (for versioning)
+            cached_content (str, optional): Gemini cached content holding the requirements
             
         Returns:
             dict: New diagram info with paths to refined files
         """
         try:
-            # Read current PlantUML
-            current_puml_path = current_diagram_info.get('puml')
-            if not current_puml_path or not os.path.exists(current_puml_path):
-                raise Exception(f"Current PlantUML file not found: {current_puml_path}")
-            
-            with open(current_puml_path, 'r', encoding='utf-8') as f:
-                current_puml = f.read()
+            # Use the PlantUML carried over from the previous refinement, else read it
+            current_puml = current_diagram_info.get('content')
+            if current_puml is None:
+                current_puml_path = current_diagram_info.get('puml')
+                if not current_puml_path or not os.path.exists(current_puml_path):
+                    raise Exception(f"Current PlantUML file not found: {current_puml_path}")
+                
+                with open(current_puml_path, 'r', encoding='utf-8') as f:
+                    current_puml = f.read()
             
             print(f"  🔄 Refining {diagram_type} diagram (iteration {iteration_num})...")
             
             # Generate Design Reviewer prompt
             reviewer_prompt = self.generate_design_reviewer_prompt(
-                requirements, current_puml, qa_metrics, diagram_type, iteration_num
+                CACHED_REQUIREMENTS_REFERENCE if cached_content else requirements,
+                current_puml, qa_metrics, diagram_type, iteration_num
             )
             
             # Get improved PlantUML from Gemini
-            improved_puml = self.send_prompt(reviewer_prompt)
+            improved_puml = self.send_prompt(reviewer_prompt, cached_content, stop_after="@enduml")
             improved_puml = self.extract_plantuml_code(improved_puml)
             
             # Save with version number
@@ -1313,8 +2013,8 @@ Generate the improved {diagram_name} Diagram now:
             filename = f"{slice_name}{version_suffix}_{diagram_type}_diagram"
             puml_path = self.save_puml_file(diagram_type, improved_puml, filename)
             
-            # Generate image
-            image_path = self.generate_image_from_puml(puml_path)
+            # Generate image (reused when the refinement left the PUML unchanged)
+            image_path = self.generate_image_cached(puml_path, improved_puml)
             
             print(f"  ✅ Refined {diagram_type} diagram saved: {puml_path}")
             
@@ -1330,6 +2030,157 @@ Generate the improved {diagram_name} Diagram now:
             print(f"  ❌ Failed to refine {diagram_type} diagram: {e}")
             return {'error': str(e), 'version': f'v{iteration_num}'}
 
+    def generate_multi_diagram_reviewer_prompt(self, requirements: str, current_pumls: Dict[str, str], qa_metrics: dict, iteration_num: int) -> str:
+        """
+        Generate a Design Reviewer prompt that improves several diagrams in one request.
+        
+        Args:
+            requirements (str): Original requirements
+            current_pumls (Dict[str, str]): Current PlantUML code keyed by diagram type
+            qa_metrics (dict): QA validation metrics with scores and recommendations
+            iteration_num (int): Current iteration number
+            
+        Returns:
+            str: Combined design reviewer prompt
+        """
+        prompt = f"""
+You are a senior UML architect and design improvement specialist. Your task is to IMPROVE an existing set of UML diagrams based on QA validation feedback, keeping them coherent with each other.
+
+ITERATION: {iteration_num}
+
+ORIGINAL REQUIREMENTS SLICE:
+{requirements}
+"""
+        for diagram_type, puml in current_pumls.items():
+            prompt += f"""
+CURRENT {diagram_type.upper()} DIAGRAM (PlantUML):
+{puml}
+"""
+        prompt += f"""
+QA VALIDATION RESULTS:
+- Overall Score: {qa_metrics.get('overall_score', 'N/A')}/10
+- Consistency Score: {qa_metrics.get('consistency_score', 'N/A')}/10
+- Completeness Score: {qa_metrics.get('completeness_score', 'N/A')}/10
+- Quality Score: {qa_metrics.get('quality_score', 'N/A')}/10
+
+CONSISTENCY ANALYSIS:
+{qa_metrics.get('consistency_analysis', 'No analysis provided')}
+
+COMPLETENESS ANALYSIS:
+{qa_metrics.get('completeness_analysis', 'No analysis provided')}
+
+QUALITY ANALYSIS:
+{qa_metrics.get('quality_analysis', 'No analysis provided')}
+
+IDENTIFIED GAPS:
+{qa_metrics.get('gap_analysis', 'No gaps identified')}
+
+RECOMMENDATIONS FOR IMPROVEMENT:
+"""
+        recommendations = qa_metrics.get('recommendations', [])
+        if recommendations:
+            for i, rec in enumerate(recommendations, 1):
+                prompt += f"{i}. {rec}\n"
+        else:
+            prompt += "No specific recommendations provided.\n"
+        
+        output_blocks = "\n".join(f"<{t}>\n@startuml\n...\n@enduml\n</{t}>" for t in current_pumls)
+        prompt += f"""
+
+TASK: Rewrite ALL of the diagrams above so that together they address the QA feedback.
+
+CRITICAL REQUIREMENTS:
+1. Address ALL identified gaps and recommendations
+2. STAY STRICTLY WITHIN THE ORIGINAL REQUIREMENTS SLICE - Do NOT model features from other requirement sections
+3. Keep the diagrams consistent with each other (same class, participant and action names)
+4. Improve the SAME scenarios, don't switch to different ones
+5. Follow UML best practices and keep each diagram readable
+
+OUTPUT FORMAT:
+- Return each improved diagram wrapped in its tag, exactly as below, and nothing else
+- Each block must contain only PlantUML code starting with @startuml and ending with @enduml
+
+{output_blocks}
+"""
+        return prompt
+
+    def refine_all_diagrams(self, requirements: str, current_diagrams: dict, qa_metrics: dict, slice_name: str, iteration_num: int, cached_content: str = None) -> dict:
+        """
+        Refine the class, sequence and activity diagrams with a single Gemini request.
+        
+        Args:
+            requirements (str): Original requirements
+            current_diagrams (dict): Current diagram info keyed by diagram type
+            qa_metrics (dict): QA validation metrics
+            slice_name (str): Name of the requirements slice
+            iteration_num (int): Current iteration number (for versioning)
+            cached_content (str, optional): Gemini cached content holding the requirements
+            
+        Returns:
+            dict: Refined diagram info (or {'error': ...}) for every diagram that was refined
+        """
+        version = f'v{iteration_num}'
+        refined = {}
+        current_pumls = {}
+        
+        for diagram_type in ('class', 'sequence', 'activity'):
+            diagram_info = current_diagrams.get(diagram_type)
+            if not diagram_info or 'error' in diagram_info:
+                continue
+            if diagram_info.get('content') is not None:
+                current_pumls[diagram_type] = diagram_info['content']
+                continue
+            try:
+                with open(diagram_info['puml'], 'r', encoding='utf-8') as f:
+                    current_pumls[diagram_type] = f.read()
+            except Exception as e:
+                refined[diagram_type] = {'error': f"Current PlantUML file not readable: {e}", 'version': version}
+        
+        if not current_pumls:
+            return refined
+        
+        print(f"  🔄 Refining {', '.join(current_pumls)} diagrams in one request (iteration {iteration_num})...")
+        
+        try:
+            reviewer_prompt = self.generate_multi_diagram_reviewer_prompt(
+                CACHED_REQUIREMENTS_REFERENCE if cached_content else requirements,
+                current_pumls, qa_metrics, iteration_num
+            )
+            response = self.send_prompt(reviewer_prompt, cached_content)
+        except Exception as e:
+            print(f"  ❌ Failed to refine diagrams: {e}")
+            for diagram_type in current_pumls:
+                refined[diagram_type] = {'error': str(e), 'version': version}
+            return refined
+        
+        blocks = {m.group(1): m.group(2) for m in REFINED_DIAGRAM_BLOCK_RE.finditer(response)}
+        
+        for diagram_type in current_pumls:
+            try:
+                if diagram_type not in blocks:
+                    raise Exception(f"No <{diagram_type}> block in refinement response")
+                
+                improved_puml = self.extract_plantuml_code(blocks[diagram_type])
+                
+                filename = f"{slice_name}_{version}_{diagram_type}_diagram"
+                puml_path = self.save_puml_file(diagram_type, improved_puml, filename)
+                image_path = self.generate_image_cached(puml_path, improved_puml)
+                
+                print(f"  ✅ Refined {diagram_type} diagram saved: {puml_path}")
+                
+                refined[diagram_type] = {
+                    'puml': puml_path,
+                    'image': image_path,
+                    'type': f'{diagram_type.capitalize()} Diagram ({version})',
+                    'version': version,
+                    'content': improved_puml
+                }
+            except Exception as e:
+                print(f"  ❌ Failed to refine {diagram_type} diagram: {e}")
+                refined[diagram_type] = {'error': str(e), 'version': version}
+        
+        return refined
+
 if __name__ == "__main__":
     # Example usage
     agent = UMLDiagramAutomation()
@@ -21,6 +21,71 @@ class RefinementLoop:
         """
         self.generator = diagram_generator
     
+    def build_refinement_prompt(self, diagram_type: str, requirements: str, 
+                                current_diagram_info: Dict, qa_metrics: Dict, 
+                                iteration_num: int) -> str:
+        """
+        Build the Design Reviewer prompt for refining a single diagram.
+        
+        Args:
+            diagram_type (str): Type of diagram (class, sequence, activity)
+            requirements (str): Original requirements
+            current_diagram_info (Dict): Current diagram info with puml path
+            qa_metrics (Dict): QA validation metrics
+            iteration_num (int): Current iteration number
+            
+        Returns:
+            str: Reviewer prompt
+        """
+        # Use the PlantUML carried over from the previous refinement, else read it
+        current_puml = current_diagram_info.get('content')
+        if current_puml is None:
+            current_puml_path = current_diagram_info.get('puml')
+            if not current_puml_path or not os.path.exists(current_puml_path):
+                raise Exception(f"Current PlantUML file not found: {current_puml_path}")
+            
+            with open(current_puml_path, 'r', encoding='utf-8') as f:
+                current_puml = f.read()
+        
+        from prompt_generator import PromptGenerator
+        return PromptGenerator.generate_design_reviewer_prompt(
+            requirements, current_puml, qa_metrics, diagram_type, iteration_num
+        )
+    
+    def save_refined_diagram(self, diagram_type: str, response: str, 
+                             slice_name: str, iteration_num: int) -> Dict[str, str]:
+        """
+        Extract, save and render the refined PlantUML returned by Gemini.
+        
+        Args:
+            diagram_type (str): Type of diagram (class, sequence, activity)
+            response (str): Gemini's reviewer response
+            slice_name (str): Name of the requirements slice
+            iteration_num (int): Current iteration number (for versioning)
+            
+        Returns:
+            Dict: New diagram info with paths to refined files
+        """
+        improved_puml = self.generator.extract_plantuml_code(response)
+        
+        # Save with version number
+        version_suffix = f"_v{iteration_num}"
+        filename = f"{slice_name}{version_suffix}_{diagram_type}_diagram"
+        puml_path = self.generator.save_puml_file(diagram_type, improved_puml, filename)
+        
+        # Generate image (reused when the refinement left the PUML unchanged)
+        image_path = self.generator.generate_image_cached(puml_path, improved_puml)
+        
+        print(f"  ✅ Refined {diagram_type} diagram saved: {puml_path}")
+        
+        return {
+            'puml': puml_path,
+            'image': image_path,
+            'type': f'{diagram_type.capitalize()} Diagram (v{iteration_num})',
+            'version': f'v{iteration_num}',
+            'content': improved_puml
+        }
+    
     def refine_diagram_with_feedback(self, diagram_type: str, requirements: str, 
                                     current_diagram_info: Dict, qa_metrics: Dict, 
                                     slice_name: str, iteration_num: int) -> Dict[str, str]:
@@ -39,47 +104,65 @@ class RefinementLoop:
             Dict: New diagram info with paths to refined files
         """
         try:
-            # Read current PlantUML
-            current_puml_path = current_diagram_info.get('puml')
-            if not current_puml_path or not os.path.exists(current_puml_path):
-                raise Exception(f"Current PlantUML file not found: {current_puml_path}")
-            
-            with open(current_puml_path, 'r', encoding='utf-8') as f:
-                current_puml = f.read()
-            
             print(f"  🔄 Refining {diagram_type} diagram (iteration {iteration_num})...")
             
-            # Generate Design Reviewer prompt
-            from prompt_generator import PromptGenerator
-            reviewer_prompt = PromptGenerator.generate_design_reviewer_prompt(
-                requirements, current_puml, qa_metrics, diagram_type, iteration_num
+            reviewer_prompt = self.build_refinement_prompt(
+                diagram_type, requirements, current_diagram_info, qa_metrics, iteration_num
             )
             
             # Get improved PlantUML from Gemini
-            improved_puml = self.generator.send_prompt(reviewer_prompt)
-            improved_puml = self.generator.extract_plantuml_code(improved_puml)
-            
-            # Save with version number
-            version_suffix = f"_v{iteration_num}"
-            filename = f"{slice_name}{version_suffix}_{diagram_type}_diagram"
-            puml_path = self.generator.save_puml_file(diagram_type, improved_puml, filename)
-            
-            # Generate image
-            image_path = self.generator.generate_image_from_puml(puml_path)
-            
-            print(f"  ✅ Refined {diagram_type} diagram saved: {puml_path}")
-            
-            return {
-                'puml': puml_path,
-                'image': image_path,
-                'type': f'{diagram_type.capitalize()} Diagram (v{iteration_num})',
-                'version': f'v{iteration_num}'
-            }
+            response = self.generator.send_prompt(reviewer_prompt, stop_after="@enduml")
+            return self.save_refined_diagram(diagram_type, response, slice_name, iteration_num)
             
         except Exception as e:
             print(f"  ❌ Failed to refine {diagram_type} diagram: {e}")
             return {'error': str(e), 'version': f'v{iteration_num}'}
     
+    def refine_diagrams_batch(self, requirements: str, previous_diagrams: Dict, 
+                              qa_metrics: Dict, slice_name: str, iteration_num: int) -> Dict[str, Dict]:
+        """
+        Refine all available diagrams, sending their reviewer prompts to Gemini as one batch.
+        
+        Args:
+            requirements (str): Original requirements
+            previous_diagrams (Dict): Diagram info from the previous iteration, keyed by type
+            qa_metrics (Dict): QA validation metrics
+            slice_name (str): Name of the requirements slice
+            iteration_num (int): Current iteration number (for versioning)
+            
+        Returns:
+            Dict: Refined diagram info (or {'error': ...}) keyed by diagram type
+        """
+        refined = {}
+        prompts = {}
+        
+        for diagram_type in ['class', 'sequence', 'activity']:
+            if diagram_type in previous_diagrams and 'error' not in previous_diagrams[diagram_type]:
+                try:
+                    prompts[diagram_type] = self.build_refinement_prompt(
+                        diagram_type, requirements, previous_diagrams[diagram_type], qa_metrics, iteration_num
+                    )
+                except Exception as e:
+                    print(f"  ❌ Failed to refine {diagram_type} diagram: {e}")
+                    refined[diagram_type] = {'error': str(e), 'version': f'v{iteration_num}'}
+            else:
+                print(f"  ⚠️  Skipping {diagram_type} (previous iteration failed)")
+                refined[diagram_type] = {'error': 'Previous iteration failed'}
+        
+        print(f"  🔄 Refining {', '.join(prompts)} diagrams in one batch (iteration {iteration_num})...")
+        responses = self.generator.generate_batch(list(prompts.values()), return_exceptions=True)
+        
+        for diagram_type, response in zip(prompts, responses):
+            try:
+                if isinstance(response, Exception):
+                    raise response
+                refined[diagram_type] = self.save_refined_diagram(diagram_type, response, slice_name, iteration_num)
+            except Exception as e:
+                print(f"  ❌ Failed to refine {diagram_type} diagram: {e}")
+                refined[diagram_type] = {'error': str(e), 'version': f'v{iteration_num}'}
+        
+        return {diagram_type: refined[diagram_type] for diagram_type in ['class', 'sequence', 'activity']}
+    
     def run_iterative_refinement(self, requirements_slice: str, slice_name: str = "RequirementSlice", 
                                 max_iterations: int = 5, target_score: int = 10, 
                                 custom_validation_prompt: str = None) -> Dict[str, any]:
@@ -123,46 +206,16 @@ class RefinementLoop:
                 'validation': None
             }
             
-            # Generate initial diagrams with v1 versioning
-            print(f"\n📊 Generating Class Diagram (v1)...")
-            try:
-                class_result = self.generator.generate_structure_diagram(
-                    requirements_slice,
-                    f"{slice_name}_v1_class_diagram"
-                )
-                iteration_1_result['diagrams']['class'] = class_result
-                print(f"✅ Class Diagram: {class_result['image']}")
-            except Exception as e:
-                print(f"❌ Class Diagram failed: {e}")
-                iteration_1_result['diagrams']['class'] = {'error': str(e)}
+            # Generate initial diagrams with v1 versioning (class, sequence and activity concurrently)
+            print(f"\n📊 Generating Class, Sequence and Activity Diagrams (v1)...")
+            iteration_1_result['diagrams'] = self.generator.generate_diagrams_parallel(
+                requirements_slice,
+                slice_name,
+                file_prefix=f"{slice_name}_v1"
+            )
+            if 'error' in iteration_1_result['diagrams']['class']:
                 return iteration_history
 
-            print(f"\n🔄 Generating Sequence Diagram (v1)...")
-            try:
-                sequence_result = self.generator.generate_interaction_diagram(
-                    f"{slice_name} Interactions",
-                    requirements_slice,
-                    f"{slice_name}_v1_sequence_diagram"
-                )
-                iteration_1_result['diagrams']['sequence'] = sequence_result
-                print(f"✅ Sequence Diagram: {sequence_result['image']}")
-            except Exception as e:
-                print(f"❌ Sequence Diagram failed: {e}")
-                iteration_1_result['diagrams']['sequence'] = {'error': str(e)}
-
-            print(f"\n🔀 Generating Activity Diagram (v1)...")
-            try:
-                activity_result = self.generator.generate_logic_diagram(
-                    requirements_slice,
-                    f"{slice_name} Workflow",
-                    f"{slice_name}_v1_activity_diagram"
-                )
-                iteration_1_result['diagrams']['activity'] = activity_result
-                print(f"✅ Activity Diagram: {activity_result['image']}")
-            except Exception as e:
-                print(f"❌ Activity Diagram failed: {e}")
-                iteration_1_result['diagrams']['activity'] = {'error': str(e)}
-
             # Validate iteration 1
             print(f"\n🔍 Validating iteration 1...")
             validation_result = self.generator.validate_diagram_consistency(
@@ -207,21 +260,14 @@ class RefinementLoop:
                     'validation': None
                 }
                 
-                # Refine each diagram type
-                for diagram_type in ['class', 'sequence', 'activity']:
-                    if diagram_type in previous_iteration['diagrams'] and 'error' not in previous_iteration['diagrams'][diagram_type]:
-                        refined_diagram = self.refine_diagram_with_feedback(
-                            diagram_type,
-                            requirements_slice,
-                            previous_iteration['diagrams'][diagram_type],
-                            previous_metrics,
-                            slice_name,
-                            iteration_num
-                        )
-                        current_iteration['diagrams'][diagram_type] = refined_diagram
-                    else:
-                        print(f"  ⚠️  Skipping {diagram_type} (previous iteration failed)")
-                        current_iteration['diagrams'][diagram_type] = {'error': 'Previous iteration failed'}
+                # Refine all diagram types with one batch of reviewer prompts
+                current_iteration['diagrams'] = self.refine_diagrams_batch(
+                    requirements_slice,
+                    previous_iteration['diagrams'],
+                    previous_metrics,
+                    slice_name,
+                    iteration_num
+                )
                 
                 # Validate refined diagrams
                 print(f"\n🔍 Validating iteration {iteration_num}...")
@@ -16,19 +16,27 @@ def regenerate_all_images():
         count = 0
         errors = 0
         
+        puml_paths = []
         for root, dirs, files in os.walk(uml.diagrams_dir):
             for file in files:
                 if file.endswith(".puml"):
-                    puml_path = os.path.join(root, file)
-                    print(f"Processing: {file}")
-                    
-                    try:
-                        image_path = uml.generate_image_from_puml(puml_path)
-                        print(f"   Generated: {image_path}")
-                        count += 1
-                    except Exception as e:
-                        print(f"   Failed: {e}")
-                        errors += 1
+                    puml_paths.append(os.path.join(root, file))
+        
+        # Render everything in one PlantUML run, then retry failures individually for their error
+        print(f"Rendering {len(puml_paths)} PUML files...")
+        images = uml.generate_images_batch(puml_paths)
+        
+        for puml_path, image_path in images.items():
+            print(f"Processing: {os.path.basename(puml_path)}")
+            
+            try:
+                if image_path is None:
+                    image_path = uml.generate_image_from_puml(puml_path)
+                print(f"   Generated: {image_path}")
+                count += 1
+            except Exception as e:
+                print(f"   Failed: {e}")
+                errors += 1
                         
         print("\n" + "="*50)
         print(f"Regeneration Complete!")
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Parallel Test Runner
+
+Runs the independent test scripts concurrently, each in its own Python process,
+and prints their output one script at a time once all have finished.
+
+Usage:
+    python run_tests.py              # offline and UML scripts
+    python run_tests.py --offline    # only the scripts that need no Gemini access
+"""
+
+import os
+import sys
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+# Scripts that exercise local logic only
+OFFLINE_TESTS = (
+    "test_penalties.py",
+    "test_validation_integration.py",
+    "test_urd_generator.py",
+)
+
+# Scripts that call Gemini and PlantUML but write to their own slice files.
+# The SRS scripts are left out because each one consumes the previous one's output.
+UML_TESTS = (
+    "test_validation.py",
+    "test_scope_enforcement.py",
+    "test_with_report.py",
+    "test_refinement_loop.py",
+)
+
+
+def run_script(script: str) -> subprocess.CompletedProcess:
+    """
+    Run one test script in a separate interpreter.
+
+    Args:
+        script (str): Test script file name
+
+    Returns:
+        subprocess.CompletedProcess: Finished process with combined stdout/stderr
+    """
+    return subprocess.run(
+        [sys.executable, script],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        text=True,
+        encoding="utf-8",
+        errors="replace"
+    )
+
+
+def main() -> bool:
+    """Run the selected scripts in parallel and report a pass/fail line for each."""
+    scripts = OFFLINE_TESTS if "--offline" in sys.argv else OFFLINE_TESTS + UML_TESTS
+
+    with ThreadPoolExecutor(max_workers=min(len(scripts), os.cpu_count() or 1)) as executor:
+        results = list(executor.map(run_script, scripts))
+
+    lines = []
+    for script, result in zip(scripts, results):
+        lines.append(f"\n{'=' * 70}\n▶ {script}\n{'=' * 70}")
+        lines.append(result.stdout.rstrip())
+
+    lines.append(f"\n{'=' * 70}\n📊 TEST RUN SUMMARY\n{'=' * 70}")
+    for script, result in zip(scripts, results):
+        status = "✅ PASS" if result.returncode == 0 else f"❌ FAIL (exit {result.returncode})"
+        lines.append(f"{status}  {script}")
+    sys.stdout.write("\n".join(lines) + "\n")
+
+    return all(result.returncode == 0 for result in results)
+
+
+if __name__ == "__main__":
+    if not main():
+        sys.exit(1)
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Shared fixtures for the UML test scripts.
+
+Provides one initialized UMLDiagramAutomation per process, so scripts (or a test
+session importing several of them) pay the Gemini setup, directory scan and
+PlantUML check only once, plus the diagram cases and file checks shared by
+several test scripts.
+"""
+
+import os
+import functools
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from llm_cache import offline_mode
+
+VALID_CLASS = '@startuml\nclass User\n@enduml'
+VALID_SEQUENCE = '@startuml\nUser -> API\n@enduml'
+VALID_ACTIVITY = '@startuml\nstart\n:Login;\nstop\n@enduml'
+
+# (title, diagram_contents, expected total penalty) for ValidationHandler.apply_diagram_penalties
+PENALTY_CASES = [
+    ("All diagrams valid", {
+        'class': VALID_CLASS,
+        'sequence': VALID_SEQUENCE,
+        'activity': VALID_ACTIVITY
+    }, 0),
+    ("One missing diagram", {
+        'class': 'Not generated',
+        'sequence': VALID_SEQUENCE,
+        'activity': VALID_ACTIVITY
+    }, 5),
+    ("One diagram with error", {
+        'class': VALID_CLASS,
+        'sequence': 'Error reading file: syntax error',
+        'activity': VALID_ACTIVITY
+    }, 3),
+    ("One missing + one error", {
+        'class': 'Not generated',
+        'sequence': 'Diagram generation failed',
+        'activity': VALID_ACTIVITY
+    }, 8),
+    ("All diagrams missing", {
+        'class': 'Not generated',
+        'sequence': 'Not generated',
+        'activity': 'Not generated'
+    }, 15),
+]
+
+
+def stat_or_none(path):
+    """Return os.stat(path), or None if the file does not exist."""
+    try:
+        return os.stat(path)
+    except FileNotFoundError:
+        return None
+
+
+def missing_files(paths):
+    """Return the paths that do not exist, listing each parent directory only once."""
+    listings = {}
+    missing = []
+    for path in paths:
+        directory, name = os.path.split(path)
+        if directory not in listings:
+            try:
+                listings[directory] = set(os.listdir(directory or "."))
+            except FileNotFoundError:
+                listings[directory] = set()
+        if name not in listings[directory]:
+            missing.append(path)
+    return missing
+
+
+def enable_llm_cache_by_default():
+    """Reuse cached Gemini responses for unchanged prompts unless LLM_CACHE is already set (LLM_CACHE=0 forces live calls)."""
+    os.environ.setdefault("LLM_CACHE", "1")
+
+
+def print_traceback_if_verbose():
+    """Print the traceback of the exception being handled, only when VERBOSE is set, to keep CI logs short."""
+    if os.environ.get("VERBOSE"):
+        traceback.print_exc()
+
+
+@functools.lru_cache(maxsize=1)
+def get_uml_agent():
+    """Create, authenticate and verify one UMLDiagramAutomation shared by all tests in this process."""
+    # Imported lazily so loading this module does not pull in the Gemini SDK
+    from p2_design_agent import UMLDiagramAutomation
+    
+    # Offline replays never reach Gemini, so a real API key is not required
+    api_key = "offline" if offline_mode() and not os.getenv('GOOGLE_API_KEY') else None
+    agent = UMLDiagramAutomation(api_key)
+    agent.setup_directories()
+    
+    # The Gemini handshake and the java startup are independent, so overlap them
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        gemini_setup = executor.submit(agent.setup_gemini)
+        plantuml_check = executor.submit(agent.verify_plantuml_installation)
+        gemini_setup.result()
+        plantuml_check.result()
+    return agent
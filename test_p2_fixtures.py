@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Shared fixtures for the Phase 2 iterative design tests.
+
+Sample requirement slices and validation prompt templates used by test_p2_iterative.py.
+"""
+
+import textwrap
+from types import MappingProxyType
+
+# Requirement slice texts, dedented and stripped once at import
+SLICE_HOME_SCREEN = textwrap.dedent("""
+3.2.1 FR-HSS: Home Screen & Vehicle Status
+FR-HSS-001: The system shall display the vehicle's current State of Charge (SoC) as a percentage value on the application's home screen.
+FR-HSS-002: The system shall display a visual representation of the vehicle's battery level.
+FR-HSS-003: The system shall display an estimated vehicle range in the user's preferred unit (miles or kilometers).
+FR-HSS-004: The estimated vehicle range calculation shall be based on the vehicle's current SoC, recent energy consumption trends, and the current ambient temperature reported by the vehicle.
+FR-HSS-005: The system shall display the vehicle's current lock status (Locked/Unlocked).
+FR-HSS-006: The system shall display the vehicle's interior cabin temperature as reported by the vehicle.
+FR-HSS-007: The system shall indicate whether the climate control system is currently active.
+FR-HSS-008: The system shall display a clear, graphical representation of the user's vehicle on the home screen.
+""").strip()
+
+SLICE_CHARGING = textwrap.dedent("""
+3.2.2 FR-CHG: Charging Management
+FR-CHG-001: The system shall allow the user to remotely start a charging session if the vehicle is plugged into a compatible charger.
+FR-CHG-002: The system shall allow the user to remotely stop a charging session.
+FR-CHG-003: During an active charging session, the system shall display: current SoC, estimated time to completion, current charging rate (kW), and supplied voltage/amperage.
+FR-CHG-004: The system shall provide an interface for the user to set a maximum charging limit as a percentage. The interface shall default to 80% for daily charging and shall provide a convenient one-time "charge to 100%" option for trips.
+FR-CHG-005: The system shall allow the user to create, edit, and delete charging schedules, defining a start time or a desired ready-by time.
+FR-CHG-006: The system shall display a map of charging stations.
+FR-CHG-007: The system shall allow the user to filter charging stations by connector type and power level (kW).
+FR-CHG-008: The system shall display real-time availability for charging stations where the data is provided by the network operator.
+""").strip()
+
+SLICE_REMOTE_CONTROLS = textwrap.dedent("""
+3.2.3 FR-RMC: Remote Controls
+FR-RMC-001: The system shall allow the user to remotely lock the vehicle's doors.
+FR-RMC-002: The system shall allow the user to remotely unlock the vehicle's doors.
+FR-RMC-003: The system shall allow the user to remotely activate the vehicle's climate control system (HVAC).
+FR-RMC-004: The system shall allow the user to set a target temperature for the cabin.
+FR-RMC-005: The system shall allow the user to remotely activate/deactivate heated seats and the heated steering wheel, if equipped.
+FR-RMC-006: The system shall allow the user to remotely activate front and rear defrosters.
+FR-RMC-007: The system shall display a warning to the user if they attempt to precondition the cabin while the vehicle is not plugged in, indicating the action will consume battery range.
+FR-RMC-008: The system shall allow the user to remotely open the front trunk (frunk) and rear trunk.
+FR-RMC-009: The system shall provide a function to remotely honk the horn and flash the lights.
+FR-RMC-010: The system shall provide haptic feedback on the user's mobile device upon successful completion of a remote lock or unlock command.
+""").strip()
+
+# Sample requirement slices (read-only, so they can be shared and used as cache keys)
+REQUIREMENT_SLICES = (
+    MappingProxyType({"name": "Home Screen & Vehicle Status", "content": SLICE_HOME_SCREEN}),
+    MappingProxyType({"name": "Charging Management", "content": SLICE_CHARGING}),
+    MappingProxyType({"name": "Remote Controls", "content": SLICE_REMOTE_CONTROLS}),
+)
+
+# Small single-slice requirements for the quick --single run
+SHOPPING_CART_REQUIREMENTS = textwrap.dedent("""
+    Shopping Cart Requirements:
+    
+    1. Users shall be able to add items to their shopping cart
+    2. The system shall calculate total price including taxes
+    3. Users shall be able to remove items from cart
+    4. Cart contents shall persist during user session
+    5. Users shall be able to proceed to checkout
+    
+    Key entities: Cart, Item, User, PriceCalculator
+    Main flow: Add Item -> Calculate Total -> Checkout
+""").strip()
+
+# Custom validation prompt requesting a strict JSON response
+VALIDATION_PROMPT_JSON = """
+You are a senior software architect reviewing UML diagrams for the {slice_name} feature.
+
+Analyze these artifacts for consistency and quality:
+
+**REQUIREMENTS:**
+{requirements}
+
+**GENERATED DIAGRAMS:**
+- Class Diagram: {class_diagram}
+- Sequence Diagram: {sequence_diagram}  
+- Activity Diagram: {activity_diagram}
+
+**VALIDATION FOCUS:**
+1. Do class structures support the described flows?
+2. Are sequence interactions realistic and complete?
+3. Do activity workflows match the requirements?
+4. Are naming conventions consistent across diagrams?
+
+Provide a comprehensive analysis and score the consistency from 1-10.
+Include specific recommendations for improvement.
+
+**OUTPUT FORMAT:**
+Please provide your analysis in strict JSON format with the following structure:
+{{
+    "consistency_analysis": "Detailed analysis...",
+    "completeness_analysis": "Analysis...",
+    "quality_analysis": "Assessment...",
+    "gap_analysis": "Gaps...",
+    "consistency_score": 8,
+    "completeness_score": 9,
+    "quality_score": 8,
+    "overall_score": 8,
+    "recommendations": ["Rec 1", "Rec 2"]
+}}
+"""
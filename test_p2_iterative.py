@@ -9,7 +9,73 @@ with consistency validation.
 
 import os
 import sys
-from p2_design_agent import UMLDiagramAutomation
+import json
+import asyncio
+import hashlib
+from test_fixtures import get_uml_agent
+from test_p2_fixtures import REQUIREMENT_SLICES, SHOPPING_CART_REQUIREMENTS, VALIDATION_PROMPT_JSON
+
+MAX_SLICE_WORKERS = 4
+RESULT_CACHE_DIR = ".gemini_cache"
+USE_RESULT_CACHE = "--no-cache" not in sys.argv
+
+def _is_complete_result(result):
+    """True when every diagram rendered and validation produced a score, i.e. the result is worth reusing."""
+    if 'error' in result:
+        return False
+    diagrams = result.get('diagrams') or {}
+    if not diagrams or any('error' in info or not info.get('image') for info in diagrams.values()):
+        return False
+    validation = result.get('validation') or {}
+    return validation.get('consistency_score', -1) != -1
+
+async def _cached_generate(uml_automation, requirements, slice_name, custom_validation_prompt=None):
+    """
+    Generate diagrams for a slice, reusing the stored result of an identical earlier run.
+    
+    Results are keyed by a SHA-256 of the requirements, slice name and validation prompt
+    and kept as JSON in RESULT_CACHE_DIR. Only complete results are stored, so a run with a
+    failed diagram or validation is retried next time. Pass --no-cache to force fresh Gemini calls.
+    """
+    key_source = f"{slice_name}\0{requirements}\0{custom_validation_prompt or ''}"
+    cache_path = os.path.join(RESULT_CACHE_DIR, f"{hashlib.sha256(key_source.encode('utf-8')).hexdigest()}.json")
+    
+    if USE_RESULT_CACHE and os.path.exists(cache_path):
+        print(f"♻️  Reusing cached result for {slice_name}: {cache_path}")
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    
+    # The three diagram prompts and the validation share the slice as a cached prefix
+    cache_name = await asyncio.to_thread(uml_automation.create_requirements_cache, requirements)
+    try:
+        result = await uml_automation.async_generate_diagrams_from_requirements_slice(
+            requirements, slice_name, custom_validation_prompt, cache_name
+        )
+    finally:
+        await asyncio.to_thread(uml_automation.delete_requirements_cache, cache_name)
+    
+    if USE_RESULT_CACHE and _is_complete_result(result):
+        os.makedirs(RESULT_CACHE_DIR, exist_ok=True)
+        with open(cache_path, 'w', encoding='utf-8') as f:
+            json.dump(result, f, separators=(",", ":"), default=str)
+    
+    return result
+
+async def _generate_slices_concurrently(uml_automation, requirement_slices, custom_validation_prompt=None):
+    """Generate and validate all requirement slices concurrently, at most MAX_SLICE_WORKERS at a time."""
+    semaphore = asyncio.Semaphore(MAX_SLICE_WORKERS)
+    
+    async def generate(req_slice):
+        async with semaphore:
+            print(f"\nProcessing slice: {req_slice['name']}")
+            return await _cached_generate(
+                uml_automation,
+                req_slice['content'],
+                req_slice['name'],
+                custom_validation_prompt
+            )
+    
+    return await asyncio.gather(*(generate(req_slice) for req_slice in requirement_slices))
 
 def test_iterative_workflow():
     """Test the iterative design workflow with sample requirement slices."""
@@ -19,98 +85,13 @@ def test_iterative_workflow():
     
     try:
         # Initialize the UML automation
-        uml_automation = UMLDiagramAutomation()
-        uml_automation.setup_gemini()
-        uml_automation.setup_directories()
-        uml_automation.verify_plantuml_installation()
+        uml_automation = get_uml_agent()
         
         print("✅ UML automation initialized successfully!\n")
         
-        # Define sample requirement slices (hardcoded for testing)
-        requirement_slices = [
-            {
-                "name": "Home Screen & Vehicle Status",
-                "content": """
-3.2.1 FR-HSS: Home Screen & Vehicle Status
-FR-HSS-001: The system shall display the vehicle's current State of Charge (SoC) as a percentage value on the application's home screen.
-FR-HSS-002: The system shall display a visual representation of the vehicle's battery level.
-FR-HSS-003: The system shall display an estimated vehicle range in the user's preferred unit (miles or kilometers).
-FR-HSS-004: The estimated vehicle range calculation shall be based on the vehicle's current SoC, recent energy consumption trends, and the current ambient temperature reported by the vehicle.
-FR-HSS-005: The system shall display the vehicle's current lock status (Locked/Unlocked).
-FR-HSS-006: The system shall display the vehicle's interior cabin temperature as reported by the vehicle.
-FR-HSS-007: The system shall indicate whether the climate control system is currently active.
-FR-HSS-008: The system shall display a clear, graphical representation of the user's vehicle on the home screen.
-                """
-            },
-            {
-                "name": "Charging Management", 
-                "content": """
-3.2.2 FR-CHG: Charging Management
-FR-CHG-001: The system shall allow the user to remotely start a charging session if the vehicle is plugged into a compatible charger.
-FR-CHG-002: The system shall allow the user to remotely stop a charging session.
-FR-CHG-003: During an active charging session, the system shall display: current SoC, estimated time to completion, current charging rate (kW), and supplied voltage/amperage.
-FR-CHG-004: The system shall provide an interface for the user to set a maximum charging limit as a percentage. The interface shall default to 80% for daily charging and shall provide a convenient one-time "charge to 100%" option for trips.
-FR-CHG-005: The system shall allow the user to create, edit, and delete charging schedules, defining a start time or a desired ready-by time.
-FR-CHG-006: The system shall display a map of charging stations.
-FR-CHG-007: The system shall allow the user to filter charging stations by connector type and power level (kW).
-FR-CHG-008: The system shall display real-time availability for charging stations where the data is provided by the network operator.
-                """
-            },
-            {
-                "name": "Remote Controls", 
-                "content": """
-3.2.3 FR-RMC: Remote Controls
-FR-RMC-001: The system shall allow the user to remotely lock the vehicle's doors.
-FR-RMC-002: The system shall allow the user to remotely unlock the vehicle's doors.
-FR-RMC-003: The system shall allow the user to remotely activate the vehicle's climate control system (HVAC).
-FR-RMC-004: The system shall allow the user to set a target temperature for the cabin.
-FR-RMC-005: The system shall allow the user to remotely activate/deactivate heated seats and the heated steering wheel, if equipped.
-FR-RMC-006: The system shall allow the user to remotely activate front and rear defrosters.
-FR-RMC-007: The system shall display a warning to the user if they attempt to precondition the cabin while the vehicle is not plugged in, indicating the action will consume battery range.
-FR-RMC-008: The system shall allow the user to remotely open the front trunk (frunk) and rear trunk.
-FR-RMC-009: The system shall provide a function to remotely honk the horn and flash the lights.
-FR-RMC-010: The system shall provide haptic feedback on the user's mobile device upon successful completion of a remote lock or unlock command.
-                """
-            }
-        ]
-        
-        # Optional: Custom validation prompt (parameterized as requested)
-        custom_validation_prompt = """
-You are a senior software architect reviewing UML diagrams for the {slice_name} feature.
-
-Analyze these artifacts for consistency and quality:
-
-**REQUIREMENTS:**
-{requirements}
-
-**GENERATED DIAGRAMS:**
-- Class Diagram: {class_diagram}
-- Sequence Diagram: {sequence_diagram}  
-- Activity Diagram: {activity_diagram}
-
-**VALIDATION FOCUS:**
-1. Do class structures support the described flows?
-2. Are sequence interactions realistic and complete?
-3. Do activity workflows match the requirements?
-4. Are naming conventions consistent across diagrams?
-
-Provide a comprehensive analysis and score the consistency from 1-10.
-Include specific recommendations for improvement.
-
-**OUTPUT FORMAT:**
-Please provide your analysis in strict JSON format with the following structure:
-{{
-    "consistency_analysis": "Detailed analysis...",
-    "completeness_analysis": "Analysis...",
-    "quality_analysis": "Assessment...",
-    "gap_analysis": "Gaps...",
-    "consistency_score": 8,
-    "completeness_score": 9,
-    "quality_score": 8,
-    "overall_score": 8,
-    "recommendations": ["Rec 1", "Rec 2"]
-}}
-"""
+        # Sample requirement slices and validation prompt shared via test_p2_fixtures
+        requirement_slices = REQUIREMENT_SLICES
+        custom_validation_prompt = VALIDATION_PROMPT_JSON
         
         print("📋 Sample requirement slices defined:")
         for i, slice_info in enumerate(requirement_slices, 1):
@@ -120,30 +101,24 @@ Please provide your analysis in strict JSON format with the following structure:
         # Run the iterative design workflow manually for the test
         print("🚀 Starting iterative design workflow...")
         
-        all_results = []
-        for req_slice in requirement_slices:
-            print(f"\nProcessing slice: {req_slice['name']}")
-            result = uml_automation.generate_diagrams_from_requirements_slice(
-                req_slice['content'],
-                req_slice['name'],
-                custom_validation_prompt
-            )
-            all_results.append(result)
+        # Slices (and the 3 diagrams within each slice) are independent, so their
+        # Gemini/PlantUML round-trips overlap; results keep the slice order
+        all_results = asyncio.run(
+            _generate_slices_concurrently(uml_automation, requirement_slices, custom_validation_prompt)
+        )
         
-        # Display results summary
-        print("\n" + "="*60)
-        print("📊 WORKFLOW RESULTS SUMMARY")
-        print("="*60)
+        # Display results summary (collected and written in one go)
+        lines = ["", "="*60, "📊 WORKFLOW RESULTS SUMMARY", "="*60]
         
         successful_slices = len([r for r in all_results if 'error' not in r])
-        print(f"Total slices processed: {len(all_results)}")
-        print(f"Successful slices: {successful_slices}")
+        lines.append(f"Total slices processed: {len(all_results)}")
+        lines.append(f"Successful slices: {successful_slices}")
         
-        print("\n🔍 Individual slice results:")
+        lines.append("\n🔍 Individual slice results:")
         for result in all_results:
             slice_name = result.get('slice_name', 'Unknown')
             if 'error' in result:
-                print(f"  ❌ {slice_name}: {result['error']}")
+                lines.append(f"  ❌ {slice_name}: {result['error']}")
             else:
                 diagrams = result.get('diagrams', {})
                 successful_diagrams = len([d for d in diagrams.values() if 'error' not in d])
@@ -151,7 +126,9 @@ Please provide your analysis in strict JSON format with the following structure:
                 metrics = validation.get('metrics', {})
                 score = metrics.get('overall_score', -1)
                 
-                print(f"  ✅ {slice_name}: {successful_diagrams}/3 diagrams, score: {score}/10")
+                lines.append(f"  ✅ {slice_name}: {successful_diagrams}/3 diagrams, score: {score}/10")
+        
+        sys.stdout.write("\n".join(lines) + "\n")
         
         print("\n🎉 Test completed successfully!")
         return True
@@ -168,29 +145,14 @@ def test_single_iteration():
     
     try:
         # Initialize the UML automation
-        uml_automation = UMLDiagramAutomation()
-        uml_automation.setup_gemini()
-        uml_automation.setup_directories()
-        
-        # Single requirement slice for quick testing
-        test_requirements = """
-        Shopping Cart Requirements:
-        
-        1. Users shall be able to add items to their shopping cart
-        2. The system shall calculate total price including taxes
-        3. Users shall be able to remove items from cart
-        4. Cart contents shall persist during user session
-        5. Users shall be able to proceed to checkout
-        
-        Key entities: Cart, Item, User, PriceCalculator
-        Main flow: Add Item -> Calculate Total -> Checkout
-        """
+        uml_automation = get_uml_agent()
         
         # Run single iteration
-        result = uml_automation.generate_diagrams_from_requirements_slice(
-            test_requirements,
+        result = asyncio.run(_cached_generate(
+            uml_automation,
+            SHOPPING_CART_REQUIREMENTS,
             "ShoppingCart"
-        )
+        ))
         
         print(f"✅ Single iteration completed!")
         print(f"Diagrams generated: {len([d for d in result.get('diagrams', {}).values() if 'error' not in d])}/3")
@@ -214,7 +176,7 @@ if __name__ == "__main__":
     print()
     
     # Test 1: Single iteration (faster)
-    if len(sys.argv) > 1 and sys.argv[1] == "--single":
+    if "--single" in sys.argv:
         success = test_single_iteration()
     else:
         # Test 2: Full iterative workflow (more comprehensive)
@@ -5,16 +5,21 @@ Test script for Iterative Refinement Loop with Modular Architecture
 This script demonstrates the new modular structure and iterative refinement functionality.
 """
 
-import os
 import sys
+from pathlib import Path
 
-# Add current directory to path for imports
-sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+# Add current directory to path for imports (once, even if imported repeatedly)
+_HERE = str(Path(__file__).parent)
+if _HERE not in sys.path:
+    sys.path.insert(0, _HERE)
 
-from p2_design_agent import UMLDiagramAutomation
+from test_fixtures import get_uml_agent, print_traceback_if_verbose, enable_llm_cache_by_default
 from refinement_loop import RefinementLoop
 from validation_handler import ValidationHandler
 
+# Shared read-only default for missing nested result dicts
+EMPTY = {}
+
 def test_refinement_loop():
     """Test the iterative refinement loop with a sample requirement."""
     
@@ -23,10 +28,7 @@ def test_refinement_loop():
     
     try:
         # Initialize the UML automation
-        agent = UMLDiagramAutomation()
-        agent.setup_gemini()
-        agent.setup_directories()
-        agent.verify_plantuml_installation()
+        agent = get_uml_agent()
         
         print("✅ UML automation initialized successfully!\n")
         
@@ -59,41 +61,51 @@ Login Authentication Requirements:
             target_score=10
         )
         
+        if 'error' in iteration_history or not iteration_history.get('iterations'):
+            print(f"❌ Refinement failed: {iteration_history.get('error', 'no iterations completed')}")
+            return False
+        
         # Save comprehensive refinement history report
         print("\n📄 Generating refinement history report...")
         report_path = ValidationHandler.save_refinement_history_report(iteration_history)
         
-        # Display summary
-        print("\n" + "="*70)
-        print("📊 REFINEMENT LOOP SUMMARY")
-        print("="*70)
-        print(f"Slice: {iteration_history.get('slice_name')}")
-        print(f"Total Iterations: {iteration_history.get('total_iterations')}")
-        print(f"Final Score: {iteration_history.get('final_score')}/10")
-        print(f"Target Achieved: {'✅ Yes' if iteration_history.get('target_achieved') else '❌ No'}")
+        # Display summary, collected and written in one go
+        summary = [
+            "\n" + "="*70,
+            "📊 REFINEMENT LOOP SUMMARY",
+            "="*70,
+            f"Slice: {iteration_history.get('slice_name')}",
+            f"Total Iterations: {iteration_history.get('total_iterations')}",
+            f"Final Score: {iteration_history.get('final_score')}/10",
+            f"Target Achieved: {'✅ Yes' if iteration_history.get('target_achieved') else '❌ No'}"
+        ]
         
         if report_path:
-            print(f"\n📄 Full refinement history: {report_path}")
+            summary.append(f"\n📄 Full refinement history: {report_path}")
         
         # Show score progression
-        print("\n📈 Score Progression:")
-        for iteration in iteration_history.get('iterations', []):
+        summary.append("\n📈 Score Progression:")
+        for iteration in iteration_history.get('iterations', ()):
             iter_num = iteration.get('iteration_num')
             version = iteration.get('version')
-            metrics = iteration.get('validation', {}).get('metrics', {})
+            validation = iteration.get('validation') or EMPTY
+            metrics = validation.get('metrics') or EMPTY
             overall = metrics.get('overall_score', 'N/A')
-            print(f"  Iteration {iter_num} ({version}): {overall}/10")
+            summary.append(f"  Iteration {iter_num} ({version}): {overall}/10")
+        
+        sys.stdout.write("\n".join(summary) + "\n")
         
         print("\n🎉 Test completed successfully!")
         return True
         
     except Exception as e:
         print(f"\n❌ Test failed: {e}")
-        import traceback
-        traceback.print_exc()
+        print_traceback_if_verbose()
         return False
 
 if __name__ == "__main__":
+    enable_llm_cache_by_default()
+    
     print("🚀 Iterative Refinement Loop Test Suite")
     print("="*70)
     print()
@@ -8,8 +8,8 @@ This test validates that the refinement system:
 3. Enforces scope adherence through validation scoring
 """
 
-import os
-from p2_design_agent import UMLDiagramAutomation
+import sys
+from test_fixtures import get_uml_agent, print_traceback_if_verbose, enable_llm_cache_by_default
 from validation_handler import ValidationHandler
 
 def test_scope_enforcement():
@@ -21,9 +21,7 @@ def test_scope_enforcement():
     print("=" * 80)
     
     try:
-        agent = UMLDiagramAutomation()
-        agent.setup_gemini()
-        agent.setup_directories()
+        agent = get_uml_agent()
         
         # Use a small, focused requirements slice
         test_slice = {
@@ -46,6 +44,10 @@ FR-HSS-003: The system shall display an estimated vehicle range in the user's pr
             test_slice['name']
         )
         
+        if 'error' in result:
+            print(f"\n❌ Generation failed: {result['error']}")
+            return False
+        
         diagrams = result.get('diagrams', {})
         validation = result.get('validation', {})
         
@@ -71,10 +73,6 @@ FR-HSS-003: The system shall display an estimated vehicle range in the user's pr
         if 'sequence' in diagrams and 'puml' in diagrams['sequence']:
             print(f"\n🔄 Testing refinement with scope enforcement...")
             
-            # Read current diagram
-            with open(diagrams['sequence']['puml'], 'r', encoding='utf-8') as f:
-                current_content = f.read()
-            
             # Simulate refinement
             refined_result = agent.refine_diagram_with_feedback(
                 diagram_type='sequence',
@@ -117,11 +115,15 @@ FR-HSS-003: The system shall display an estimated vehicle range in the user's pr
         print("\n" + "=" * 80)
         print("✅ Scope enforcement test completed!")
         print("=" * 80)
+        return True
         
     except Exception as e:
         print(f"\n❌ Test failed with error: {e}")
-        import traceback
-        traceback.print_exc()
+        print_traceback_if_verbose()
+        return False
 
 if __name__ == "__main__":
-    test_scope_enforcement()
+    enable_llm_cache_by_default()
+    
+    if not test_scope_enforcement():
+        sys.exit(1)
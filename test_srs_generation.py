@@ -4,8 +4,8 @@ Test script for SRS Generation functionality
 """
 
 from p1_requirements_agent import GeminiAutomation
-import os
 import sys
+from test_fixtures import stat_or_none, enable_llm_cache_by_default
 
 def test_srs_generation():
     """Test the SRS generation process"""
@@ -32,9 +32,9 @@ def test_srs_generation():
         # Check generated files
         files_to_check = ["URD.txt", "SRS_v1.txt"]
         for file_name in files_to_check:
-            if os.path.exists(file_name):
-                file_size = os.path.getsize(file_name)
-                print(f"✓ {file_name} - {file_size} bytes")
+            file_stat = stat_or_none(file_name)
+            if file_stat:
+                print(f"✓ {file_name} - {file_stat.st_size} bytes")
             else:
                 print(f"✗ {file_name} - Not found")
         
@@ -48,6 +48,8 @@ def test_srs_generation():
         return False
 
 if __name__ == "__main__":
+    enable_llm_cache_by_default()
+    
     success = test_srs_generation()
     if not success:
         sys.exit(1)
\ No newline at end of file
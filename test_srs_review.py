@@ -6,6 +6,7 @@ Test script for SRS Review functionality
 from p1_requirements_agent import GeminiAutomation
 import os
 import sys
+from test_fixtures import stat_or_none, missing_files, enable_llm_cache_by_default
 
 def test_srs_review():
     """Test the SRS review process"""
@@ -18,15 +19,11 @@ def test_srs_review():
         automator = GeminiAutomation()
         
         # Check if required files exist
-        required_files = [\"SRS_v1.txt\", os.path.join(\"reports\", \"SRSVR_v1.txt\")]
-        missing_files = []
+        required_files = ["SRS_v1.txt", os.path.join("reports", "SRSVR_v1.txt")]
+        missing = missing_files(required_files)
         
-        for file_name in required_files:
-            if not os.path.exists(file_name):
-                missing_files.append(file_name)
-        
-        if missing_files:
-            print(f"Missing required files: {', '.join(missing_files)}")
+        if missing:
+            print(f"Missing required files: {', '.join(missing)}")
             print("Please ensure these files exist before running SRS review.")
             print("Run SRS generation and validation first.")
             return False
@@ -44,8 +41,8 @@ def test_srs_review():
         
         # Run the SRS review
         reviewed_srs = automator.run_srs_review(
-            srs_file_path=\"SRS_v1.txt\",
-            validation_report_path=os.path.join(\"reports\", \"SRSVR_v1.txt\")
+            srs_file_path="SRS_v1.txt",
+            validation_report_path=os.path.join("reports", "SRSVR_v1.txt")
         )
         
         print()
@@ -54,12 +51,13 @@ def test_srs_review():
         print("=" * 60)
         
         # Check if the new SRS version was created
-        if os.path.exists(next_version):
-            file_size = os.path.getsize(next_version)
+        next_stat = stat_or_none(next_version)
+        if next_stat:
+            file_size = next_stat.st_size
             print(f"✓ {next_version} - {file_size} bytes")
             
             # Compare file sizes to see if improvements were made
-            original_size = os.path.getsize("SRS_v1.txt")
+            original_size = os.stat("SRS_v1.txt").st_size
             print(f"Original SRS (v1): {original_size} bytes")
             print(f"Reviewed SRS ({next_version}): {file_size} bytes")
             
@@ -84,6 +82,8 @@ def test_srs_review():
         return False
 
 if __name__ == "__main__":
+    enable_llm_cache_by_default()
+    
     success = test_srs_review()
     if not success:
         sys.exit(1)
\ No newline at end of file
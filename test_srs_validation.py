@@ -6,6 +6,7 @@ Test script for SRS Validation functionality
 from p1_requirements_agent import GeminiAutomation
 import os
 import sys
+from test_fixtures import stat_or_none, missing_files, enable_llm_cache_by_default
 
 def test_srs_validation():
     """Test the SRS validation process"""
@@ -19,14 +20,10 @@ def test_srs_validation():
         
         # Check if required files exist
         required_files = ["URD.txt", "SRS_v1.txt", "830-1998.pdf"]
-        missing_files = []
+        missing = missing_files(required_files)
         
-        for file_name in required_files:
-            if not os.path.exists(file_name):
-                missing_files.append(file_name)
-        
-        if missing_files:
-            print(f"Missing required files: {', '.join(missing_files)}")
+        if missing:
+            print(f"Missing required files: {', '.join(missing)}")
             print("Please ensure these files exist before running validation.")
             return False
         
@@ -49,9 +46,9 @@ def test_srs_validation():
         
         # Check if validation report was created
         report_path = os.path.join("reports", "SRSVR_v1.txt")
-        if os.path.exists(report_path):
-            file_size = os.path.getsize(report_path)
-            print(f"✓ {report_path} - {file_size} bytes")
+        report_stat = stat_or_none(report_path)
+        if report_stat:
+            print(f"✓ {report_path} - {report_stat.st_size} bytes")
             
             # Extract and display error count
             error_count = automator.extract_error_count(validation_report)
@@ -76,6 +73,8 @@ def test_srs_validation():
         return False
 
 if __name__ == "__main__":
+    enable_llm_cache_by_default()
+    
     success = test_srs_validation()
     if not success:
         sys.exit(1)
\ No newline at end of file
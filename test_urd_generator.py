@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Test script for concurrent URD generation
+
+Runs URDGenerator.generate_urds against a stand-in model, so it needs no Gemini access.
+Checks result order, per-prompt failures and that responses go through the LLM cache.
+"""
+
+import os
+import sys
+import tempfile
+from types import SimpleNamespace
+from urd_generator import URDGenerator
+
+PROMPTS = ["Prompt A", "FAIL", "Prompt C"]
+
+
+class FakeModel:
+    """Answers generate_content_async locally and counts the calls that reach it."""
+
+    def __init__(self):
+        self.calls = 0
+
+    async def generate_content_async(self, prompt):
+        self.calls += 1
+        if prompt == "FAIL":
+            raise RuntimeError("simulated Gemini error")
+        return SimpleNamespace(text=f"URD for {prompt}")
+
+
+def _generator():
+    generator = URDGenerator(api_key="offline")
+    generator.model = FakeModel()
+    return generator
+
+
+def test_generate_urds():
+    """Results come back in prompt order, with the exception in place of a failed prompt."""
+    print("🧪 generate_urds without cache")
+    os.environ.pop("LLM_CACHE", None)
+    os.environ.pop("LLM_OFFLINE", None)
+
+    results = _generator().generate_urds(PROMPTS)
+
+    ok = (results[0] == "URD for Prompt A"
+          and isinstance(results[1], Exception)
+          and results[2] == "URD for Prompt C")
+    print(f"  {'✅' if ok else '❌'} Results: {results}")
+    return ok
+
+
+def test_generate_urds_cached():
+    """A repeated run is answered from the cache, and offline mode never reaches the model."""
+    print("🧪 generate_urds with LLM_CACHE=1")
+    # The cache database is created in the working directory on first use
+    os.chdir(tempfile.mkdtemp())
+    os.environ["LLM_CACHE"] = "1"
+
+    generator = _generator()
+    first = generator.generate_urds(PROMPTS)
+    calls_after_first = generator.model.calls
+    second = generator.generate_urds(PROMPTS)
+
+    cached_ok = (first[0] == second[0] and first[2] == second[2]
+                 and generator.model.calls == calls_after_first + 1)  # only the failed prompt is retried
+    print(f"  {'✅' if cached_ok else '❌'} Model calls: {calls_after_first} then {generator.model.calls}")
+
+    os.environ["LLM_OFFLINE"] = "1"
+    calls_before_offline = generator.model.calls
+    offline = generator.generate_urds(["Prompt never recorded"])
+    offline_ok = isinstance(offline[0], Exception) and generator.model.calls == calls_before_offline
+    print(f"  {'✅' if offline_ok else '❌'} Offline miss raised without a model call: {offline[0]}")
+
+    return cached_ok and offline_ok
+
+
+if __name__ == "__main__":
+    success = test_generate_urds() and test_generate_urds_cached()
+    if not success:
+        sys.exit(1)
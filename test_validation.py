@@ -1,11 +1,10 @@
 
-import os
 import sys
-from p2_design_agent import UMLDiagramAutomation
+from test_fixtures import get_uml_agent, enable_llm_cache_by_default
 
 def test_validation():
     try:
-        agent = UMLDiagramAutomation()
+        agent = get_uml_agent()
         
         # Mock requirements
         requirements = "The system shall allow users to log in using their email and password. If the password is correct, the user is redirected to the dashboard. If incorrect, an error message is shown."
@@ -14,16 +13,12 @@ def test_validation():
         print(f"Testing validation for slice: {slice_name}")
         
         # Run the generation and validation
-        # We need to ensure directories exist
-        agent.setup_directories()
-        agent.setup_gemini()
-        agent.verify_plantuml_installation()
-        
         result = agent.generate_diagrams_from_requirements_slice(requirements, slice_name)
         
         print("\n=== Test Results ===")
         if 'error' in result:
             print(f"❌ Error: {result['error']}")
+            return False
         else:
             print("✅ Iteration completed successfully")
             
@@ -36,12 +31,18 @@ def test_validation():
             
             if metrics.get('consistency_score') != -1:
                 print("✅ JSON parsing successful!")
+                return True
             else:
                 print("❌ JSON parsing failed or scores missing.")
                 print(f"Raw Report: {validation.get('report')[:500]}...")
+                return False
 
     except Exception as e:
         print(f"❌ Test failed with exception: {e}")
+        return False
 
 if __name__ == "__main__":
-    test_validation()
+    enable_llm_cache_by_default()
+    
+    if not test_validation():
+        sys.exit(1)
@@ -5,78 +5,47 @@ Test Script for ValidationHandler Integration
 This script tests the penalty system integration with the main p2_design_agent workflow.
 """
 
+import sys
 from validation_handler import ValidationHandler
+from test_fixtures import PENALTY_CASES
+
+# Starting Gemini score for each of the shared PENALTY_CASES
+STARTING_SCORES = (8, 8, 7, 6, 9)
 
 def test_penalty_system():
     """Test the penalty application logic."""
-    print("🧪 Testing ValidationHandler Penalty System")
-    print("=" * 50)
-    
-    # Test Case 1: No missing diagrams
-    print("\n📋 Test Case 1: All diagrams successful")
-    metrics1 = {'overall_score': 8}
-    diagram_contents1 = {
-        'class': '@startuml\nclass User\n@enduml',
-        'sequence': '@startuml\nUser -> API\n@enduml',
-        'activity': '@startuml\nstart\n:action;\nstop\n@enduml'
-    }
-    
-    result1 = ValidationHandler.apply_diagram_penalties(metrics1, diagram_contents1)
-    print(f"Original Score: {metrics1['overall_score']}")
-    print(f"Final Score: {result1['overall_score']}")
-    print(f"Penalties: {result1.get('penalties_applied', {}).get('total_penalty', 0)}")
-    
-    # Test Case 2: One missing diagram
-    print("\n📋 Test Case 2: One missing diagram")
-    metrics2 = {'overall_score': 8}
-    diagram_contents2 = {
-        'class': '@startuml\nclass User\n@enduml',
-        'sequence': 'Not generated',
-        'activity': '@startuml\nstart\n:action;\nstop\n@enduml'
-    }
-    
-    result2 = ValidationHandler.apply_diagram_penalties(metrics2, diagram_contents2)
-    print(f"Original Score: {metrics2['overall_score']}")
-    print(f"Final Score: {result2['overall_score']}")
-    print(f"Penalties: {result2.get('penalties_applied', {}).get('total_penalty', 0)}")
-    print(f"Penalty Notes: {result2.get('penalties_applied', {}).get('penalty_notes', [])}")
-    
-    # Test Case 3: One error diagram
-    print("\n📋 Test Case 3: One diagram with errors")
-    metrics3 = {'overall_score': 7}
-    diagram_contents3 = {
-        'class': '@startuml\nclass User\n@enduml',
-        'sequence': '@startuml\nUser -> API\n@enduml',
-        'activity': 'Diagram generation failed: Syntax error'
-    }
-    
-    result3 = ValidationHandler.apply_diagram_penalties(metrics3, diagram_contents3)
-    print(f"Original Score: {metrics3['overall_score']}")
-    print(f"Final Score: {result3['overall_score']}")
-    print(f"Penalties: {result3.get('penalties_applied', {}).get('total_penalty', 0)}")
-    print(f"Penalty Notes: {result3.get('penalties_applied', {}).get('penalty_notes', [])}")
-    
-    # Test Case 4: Multiple issues
-    print("\n📋 Test Case 4: Multiple issues")
-    metrics4 = {'overall_score': 6}
-    diagram_contents4 = {
-        'class': 'Not generated',
-        'sequence': 'Error reading file: File not found',
-        'activity': '@startuml\nstart\n:action;\nstop\n@enduml'
-    }
-    
-    result4 = ValidationHandler.apply_diagram_penalties(metrics4, diagram_contents4)
-    print(f"Original Score: {metrics4['overall_score']}")
-    print(f"Final Score: {result4['overall_score']}")
-    print(f"Penalties: {result4.get('penalties_applied', {}).get('total_penalty', 0)}")
-    print(f"Penalty Notes: {result4.get('penalties_applied', {}).get('penalty_notes', [])}")
-    
-    print("\n" + "=" * 50)
-    print("✅ Penalty system test completed!")
-    print("\n🎯 Expected behavior:")
-    print("- Missing diagrams: -5 points each")
-    print("- Error diagrams: -3 points each")
-    print("- Minimum score: 0 (no negative scores)")
+    # Collect the report and write it once instead of one print per line
+    lines = ["🧪 Testing ValidationHandler Penalty System", "=" * 50]
+    
+    inputs = [({'overall_score': score}, diagram_contents)
+              for score, (_, diagram_contents, _) in zip(STARTING_SCORES, PENALTY_CASES)]
+    results = ValidationHandler.apply_diagram_penalties_batch(inputs)
+    
+    failures = []
+    for number, ((title, _, penalty), score, result) in enumerate(zip(PENALTY_CASES, STARTING_SCORES, results), 1):
+        lines.append(f"\n📋 Test Case {number}: {title}")
+        penalties = result.get('penalties_applied', {})
+        lines.append(f"Original Score: {result['original_overall_score']}")
+        lines.append(f"Final Score: {result['overall_score']}")
+        lines.append(f"Penalties: {penalties.get('total_penalty', 0)}")
+        if penalty:
+            lines.append(f"Penalty Notes: {penalties.get('penalty_notes', [])}")
+        expected = max(0, score - penalty)
+        if result['overall_score'] != expected:
+            failures.append(f"Test Case {number}: expected {expected}, got {result['overall_score']}")
+    
+    lines.append("\n" + "=" * 50)
+    if not failures:
+        lines.append("✅ Penalty system test completed!")
+    lines.append("\n🎯 Expected behavior:")
+    lines.append("- Missing diagrams: -5 points each")
+    lines.append("- Error diagrams: -3 points each")
+    lines.append("- Minimum score: 0 (no negative scores)")
+    for failure in failures:
+        lines.append(f"❌ {failure}")
+    sys.stdout.write("\n".join(lines) + "\n")
+    return not failures
 
 if __name__ == "__main__":
-    test_penalty_system()
\ No newline at end of file
+    if not test_penalty_system():
+        sys.exit(1)
\ No newline at end of file
@@ -3,8 +3,9 @@
 Test script that generates diagrams and saves a detailed QA report
 """
 
-import os
-from p2_design_agent import UMLDiagramAutomation
+import sys
+import asyncio
+from test_fixtures import get_uml_agent, print_traceback_if_verbose, enable_llm_cache_by_default
 
 def test_with_qa_report():
     """Generate diagrams and save QA validation report."""
@@ -13,10 +14,7 @@ def test_with_qa_report():
     print("="*60)
     
     try:
-        agent = UMLDiagramAutomation()
-        agent.setup_directories()
-        agent.setup_gemini()
-        agent.verify_plantuml_installation()
+        agent = get_uml_agent()
         
         # Test requirements
         requirements = """
@@ -27,10 +25,14 @@ The system shall track login attempts and lock the account after 3 failed attemp
 """
         
         print("\n📊 Generating diagrams and validation report...")
-        result = agent.generate_diagrams_from_requirements_slice(
+        result = asyncio.run(agent.async_generate_diagrams_from_requirements_slice(
             requirements, 
             "Login_Authentication"
-        )
+        ))
+        
+        if 'error' in result:
+            print(f"❌ Generation failed: {result['error']}")
+            return False
         
         # Save the detailed report
         all_results = [result]
@@ -53,9 +55,11 @@ The system shall track login attempts and lock the account after 3 failed attemp
         
     except Exception as e:
         print(f"❌ Test failed: {e}")
-        import traceback
-        traceback.print_exc()
+        print_traceback_if_verbose()
         return False
 
 if __name__ == "__main__":
-    test_with_qa_report()
+    enable_llm_cache_by_default()
+    
+    if not test_with_qa_report():
+        sys.exit(1)
@@ -4,18 +4,53 @@ URD Generation Script
 
 This script handles the initial state prompt to generate User Requirements Documents (URD).
 This is typically run once at the beginning of a project to create the initial URD file.
+
+Usage:
+    python urd_generator.py            # interactive request
+    python urd_generator.py --batch    # Gemini Batch API (half price, results within 24h; needs google-genai)
 """
 
 import os
 import sys
+import json
+import time
+import asyncio
 import datetime
+import tempfile
 import google.generativeai as genai
-from typing import Optional
+from typing import Optional, List, Union
 from dotenv import load_dotenv
+from llm_cache import cached_generate, cached_generate_async, cache_enabled
 
 # Load environment variables from .env file
 load_dotenv()
 
+# Upper bound on Gemini requests in flight at once, to stay within rate limits
+MAX_CONCURRENT_PROMPTS = 4
+
+# Gemini Batch API polling: first wait and upper bound between job state checks (seconds)
+BATCH_POLL_INITIAL = 10
+BATCH_POLL_MAX = 300
+BATCH_DONE_STATES = ("JOB_STATE_SUCCEEDED", "JOB_STATE_FAILED", "JOB_STATE_CANCELLED", "JOB_STATE_EXPIRED")
+
+# Default initial state prompt for the electric car management app, sent as a single request;
+# at a few hundred tokens it is far below Gemini's minimum size for context caching,
+# so repeat runs rely on the LLM response cache instead.
+DEFAULT_URD_PROMPT = """Let's generate a document with user requirements for a mobile application that will be an electric car management app. 
+
+Pretend you are the user describing what you want for the app. You're not a technical user, you are part of the car engineering team so you do have a deep understanding of the car itself.
+
+Please provide detailed requirements covering:
+- Vehicle monitoring and status
+- Charging management and scheduling
+- Remote vehicle control capabilities
+- Trip planning and route optimization
+- Maintenance and diagnostics
+- User experience and interface needs
+- Security and privacy requirements
+
+Write from the perspective of an engineering team member who understands electric vehicles but needs a user-friendly mobile interface."""
+
 
 class URDGenerator:
     """Class to handle URD generation from initial state prompts."""
@@ -30,6 +65,7 @@ class URDGenerator:
         """
         self.api_key = api_key or os.getenv('GOOGLE_API_KEY')
         self.model = None
+        self.model_name = 'gemini-2.0-flash-exp'
         self.output_file = os.getenv('URD', "URD.txt")
         
         if not self.api_key:
@@ -42,18 +78,19 @@ class URDGenerator:
             genai.configure(api_key=self.api_key)
             
             # Initialize the Gemini 2.5 Pro model
-            self.model = genai.GenerativeModel('gemini-2.0-flash-exp')
+            self.model = genai.GenerativeModel(self.model_name)
             print("Gemini 2.5 Pro model initialized successfully!")
             
         except Exception as e:
             raise Exception(f"Failed to initialize Gemini model: {e}")
     
-    def send_prompt(self, prompt: str) -> str:
+    def send_prompt(self, prompt: str, force_refresh: bool = False) -> str:
         """
         Send a prompt to Gemini and return the response.
         
         Args:
             prompt (str): The prompt to send to Gemini
+            force_refresh (bool): Bypass the response cache and store the new answer
             
         Returns:
             str: Gemini's response
@@ -62,18 +99,147 @@ class URDGenerator:
             raise Exception("Gemini model not initialized. Call setup_gemini() first.")
         
         try:
-            print(f"Sending prompt to Gemini...")
-            response = self.model.generate_content(prompt)
+            def generate():
+                print(f"Sending prompt to Gemini...")
+                response = self.model.generate_content(prompt)
+                
+                if response.text:
+                    print("Response received successfully!")
+                    return response.text
+                else:
+                    raise Exception("No response text received from Gemini")
+            
+            return cached_generate(self.model_name, prompt, generate, force_refresh=force_refresh)
+                
+        except Exception as e:
+            raise Exception(f"Failed to send prompt to Gemini: {e}")
+    
+    async def send_prompt_async(self, prompt: str, semaphore: Optional[asyncio.Semaphore] = None) -> str:
+        """
+        Send a prompt to Gemini without blocking the event loop.
+        
+        Args:
+            prompt (str): The prompt to send to Gemini
+            semaphore (asyncio.Semaphore, optional): Limits how many requests are in flight at once
+            
+        Returns:
+            str: Gemini's response
+        """
+        if not self.model:
+            raise Exception("Gemini model not initialized. Call setup_gemini() first.")
+        
+        async def generate():
+            if semaphore is None:
+                response = await self.model.generate_content_async(prompt)
+            else:
+                async with semaphore:
+                    response = await self.model.generate_content_async(prompt)
             
             if response.text:
-                print("Response received successfully!")
                 return response.text
             else:
                 raise Exception("No response text received from Gemini")
+        
+        try:
+            return await cached_generate_async(self.model_name, prompt, generate)
                 
         except Exception as e:
             raise Exception(f"Failed to send prompt to Gemini: {e}")
     
+    async def generate_urds_async(self, prompts: List[str]) -> List[Union[str, Exception]]:
+        """
+        Send several URD prompts concurrently.
+        
+        Args:
+            prompts (List[str]): Initial state prompts
+            
+        Returns:
+            List[Union[str, Exception]]: Response text for each prompt, in order, or the
+                                         exception raised for that prompt
+        """
+        if not self.model:
+            self.setup_gemini()
+        
+        semaphore = asyncio.Semaphore(MAX_CONCURRENT_PROMPTS)
+        print(f"Sending {len(prompts)} prompts to Gemini...")
+        return await asyncio.gather(
+            *(self.send_prompt_async(prompt, semaphore) for prompt in prompts),
+            return_exceptions=True
+        )
+    
+    def generate_urds(self, prompts: List[str]) -> List[Union[str, Exception]]:
+        """
+        Synchronous wrapper around generate_urds_async.
+        
+        Args:
+            prompts (List[str]): Initial state prompts
+            
+        Returns:
+            List[Union[str, Exception]]: Response text or exception for each prompt, in order
+        """
+        return asyncio.run(self.generate_urds_async(prompts))
+    
+    def generate_urds_batch(self, prompts: List[str]) -> List[Optional[str]]:
+        """
+        Submit prompts as one Gemini Batch API job and wait for its results.
+        
+        Batch jobs are billed at half the standard rate and are not subject to the
+        per-minute request limits, but may take up to 24 hours to complete.
+        Requires the google-genai package.
+        
+        Args:
+            prompts (List[str]): Initial state prompts
+            
+        Returns:
+            List[Optional[str]]: Response text for each prompt, in order (None if the job returned none)
+        """
+        try:
+            from google import genai as genai_client
+        except ImportError as e:
+            raise Exception(f"Batch mode requires the google-genai package: {e}")
+        
+        try:
+            client = genai_client.Client(api_key=self.api_key)
+            
+            # One JSONL line per request, keyed by prompt index
+            with tempfile.NamedTemporaryFile('w', suffix='.jsonl', delete=False, encoding='utf-8') as file:
+                for index, prompt in enumerate(prompts):
+                    request = {"contents": [{"parts": [{"text": prompt}]}]}
+                    file.write(json.dumps({"key": f"urd_{index}", "request": request}) + "\n")
+                requests_path = file.name
+            try:
+                uploaded = client.files.upload(file=requests_path, config={'mime_type': 'jsonl'})
+            finally:
+                os.remove(requests_path)
+            
+            batch_job = client.batches.create(model=self.model_name, src=uploaded.name)
+            print(f"Submitted batch job {batch_job.name} with {len(prompts)} prompts")
+            
+            # Poll with exponential backoff until the job reaches a final state
+            delay = BATCH_POLL_INITIAL
+            while batch_job.state.name not in BATCH_DONE_STATES:
+                time.sleep(delay)
+                delay = min(delay * 2, BATCH_POLL_MAX)
+                batch_job = client.batches.get(name=batch_job.name)
+                print(f"Batch job state: {batch_job.state.name}")
+            
+            if batch_job.state.name != "JOB_STATE_SUCCEEDED":
+                raise Exception(f"Batch job ended in state {batch_job.state.name}")
+            
+            responses = {}
+            for line in client.files.download(file=batch_job.dest.file_name).decode('utf-8').splitlines():
+                if not line.strip():
+                    continue
+                result = json.loads(line)
+                candidates = result.get("response", {}).get("candidates") or [{}]
+                parts = candidates[0].get("content", {}).get("parts", [])
+                responses[result.get("key")] = "".join(part.get("text", "") for part in parts) or None
+            
+            return [responses.get(f"urd_{index}") for index in range(len(prompts))]
+            
+        except Exception as e:
+            raise Exception(f"Failed to run Gemini batch job: {e}")
+    
     def save_urd_to_file(self, prompt: str, response: str):
         """
         Save the URD response to a text file.
@@ -83,12 +249,8 @@ class URDGenerator:
             response (str): Gemini's response
         """
         try:
-            timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            
             with open(self.output_file, "w", encoding="utf-8") as file:
-                file.write(f"User Requirements Document (URD)\n")
-                file.write(f"Generated on: {timestamp}\n")
-                file.write(f"{'='*80}\n\n")
+                self._write_urd_header(file)
                 file.write(response)
             
             print(f"URD saved to {self.output_file}")
@@ -96,32 +258,92 @@ class URDGenerator:
         except Exception as e:
             raise Exception(f"Failed to save URD to file: {e}")
     
-    def generate_urd(self, initial_prompt: str):
+    @staticmethod
+    def _write_urd_header(file):
+        """Write the URD title and generation timestamp to an open text file."""
+        timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        file.write(f"User Requirements Document (URD)\n")
+        file.write(f"Generated on: {timestamp}\n")
+        file.write(f"{'='*80}\n\n")
+    
+    def stream_urd_to_file(self, prompt: str) -> str:
+        """
+        Stream Gemini's response into the URD file as chunks arrive.
+        
+        The text is written to a temporary file next to the output file and moved
+        into place only once the response is complete, so a failed request never
+        leaves a truncated URD behind.
+        
+        Args:
+            prompt (str): The prompt to send to Gemini
+            
+        Returns:
+            str: Path of the saved URD file
+        """
+        if not self.model:
+            raise Exception("Gemini model not initialized. Call setup_gemini() first.")
+        
+        tmp_path = f"{self.output_file}.tmp"
+        try:
+            print(f"Streaming response from Gemini...")
+            received = False
+            with open(tmp_path, "w", encoding="utf-8") as file:
+                self._write_urd_header(file)
+                for chunk in self.model.generate_content(prompt, stream=True):
+                    if chunk.text:
+                        file.write(chunk.text)
+                        received = True
+            
+            if not received:
+                raise Exception("No response text received from Gemini")
+            
+            os.replace(tmp_path, self.output_file)
+            print(f"URD saved to {self.output_file}")
+            return self.output_file
+            
+        except Exception as e:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise Exception(f"Failed to stream URD from Gemini: {e}")
+    
+    def generate_urd(self, initial_prompt: str, batch: bool = False):
         """
         Main URD generation function that sends initial state prompt and saves URD.
         
         Args:
             initial_prompt (str): The initial state prompt to generate URD
+            batch (bool): Submit through the Gemini Batch API (cheaper, but not interactive)
+            
+        Returns:
+            str: Path of the saved URD file
         """
         try:
             print("Starting URD Generation Process...")
             print("=" * 50)
             
-            # Setup Gemini if not already done
-            if not self.model:
-                self.setup_gemini()
-            
-            # Send prompt and get response
-            response = self.send_prompt(initial_prompt)
-            
-            # Save to file
-            self.save_urd_to_file(initial_prompt, response)
+            if batch:
+                response = self.generate_urds_batch([initial_prompt])[0]
+                if not response:
+                    raise Exception("No response text received from Gemini batch job")
+                self.save_urd_to_file(initial_prompt, response)
+            else:
+                # Setup Gemini if not already done
+                if not self.model:
+                    self.setup_gemini()
+                
+                if cache_enabled():
+                    # A cached answer has to be complete, so fetch it whole
+                    response = self.send_prompt(initial_prompt)
+                    self.save_urd_to_file(initial_prompt, response)
+                else:
+                    # Write the response to disk as it is generated
+                    self.stream_urd_to_file(initial_prompt)
             
             print("=" * 50)
             print("URD Generation Process Completed Successfully!")
             print(f"URD saved as: {self.output_file}")
             
-            return response
+            return self.output_file
             
         except Exception as e:
             raise Exception(f"URD generation failed: {e}")
@@ -137,27 +359,14 @@ def main():
         urd_generator = URDGenerator()
         
         # Default initial state prompt for electric car management app
-        default_prompt = """Let's generate a document with user requirements for a mobile application that will be an electric car management app. 
-
-Pretend you are the user describing what you want for the app. You're not a technical user, you are part of the car engineering team so you do have a deep understanding of the car itself.
-
-Please provide detailed requirements covering:
-- Vehicle monitoring and status
-- Charging management and scheduling
-- Remote vehicle control capabilities
-- Trip planning and route optimization
-- Maintenance and diagnostics
-- User experience and interface needs
-- Security and privacy requirements
-
-Write from the perspective of an engineering team member who understands electric vehicles but needs a user-friendly mobile interface."""
+        default_prompt = DEFAULT_URD_PROMPT
         
         print("Using default electric car management app prompt...")
         print("(You can modify the prompt in the script if needed)")
         print()
         
         # Generate URD
-        urd_content = urd_generator.generate_urd(default_prompt)
+        urd_path = urd_generator.generate_urd(default_prompt, batch="--batch" in sys.argv)
         
         print()
         print("URD generation completed!")
@@ -3,11 +3,51 @@ Validation Module for UML Diagram Automation
 Handles diagram validation, QA metrics extraction, and report generation.
 """
 
-import json
 import re
-import datetime
 import os
-from typing import Dict, List, Any
+import datetime
+import functools
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Tuple
+
+# Points deducted per diagram by apply_diagram_penalties
+MISSING_DIAGRAM_PENALTY = 5
+ERROR_DIAGRAM_PENALTY = 3
+
+# Diagram content markers recognised by apply_diagram_penalties
+NOT_GENERATED_MARKER = "Not generated"
+ERROR_MARKERS = ("Diagram generation failed", "Error reading file")
+ERROR_MARKER_RE = re.compile("|".join(map(re.escape, ERROR_MARKERS)))
+
+# Text shown in the QA report for metrics Gemini did not provide
+QA_REPORT_DEFAULTS = {
+    'overall_score': 'N/A',
+    'scope_adherence_score': 'N/A',
+    'consistency_score': 'N/A',
+    'completeness_score': 'N/A',
+    'quality_score': 'N/A',
+    'scope_adherence_analysis': 'No scope analysis provided',
+    'consistency_analysis': 'No analysis provided',
+    'completeness_analysis': 'No analysis provided',
+    'quality_analysis': 'No analysis provided',
+    'gap_analysis': 'No gaps identified'
+}
+
+
+def _compute_penalty(missing_count: int, error_count: int) -> Tuple[int, int]:
+    """Return (missing_penalty, error_penalty) for the given diagram counts."""
+    return missing_count * MISSING_DIAGRAM_PENALTY, error_count * ERROR_DIAGRAM_PENALTY
+
+
+@functools.lru_cache(maxsize=256)
+def _format_scope_violations_cached(violations: Tuple[str, ...]) -> str:
+    """Format scope violations for QA report; memoized because stable slices repeat the same list."""
+    if not violations or (len(violations) == 1 and not violations[0]):
+        return "**Scope Violations:** None detected ✅"
+    
+    lines = ["**⚠️ SCOPE VIOLATIONS DETECTED:**\n"]
+    lines.extend(f"- {violation}\n" for violation in violations if violation)  # Skip empty strings
+    return "".join(lines)
 
 
 class ValidationHandler:
@@ -16,14 +56,30 @@ class ValidationHandler:
     @staticmethod
     def _format_scope_violations(violations: List[str]) -> str:
         """Format scope violations for QA report."""
-        if not violations or (len(violations) == 1 and not violations[0]):
-            return "**Scope Violations:** None detected ✅"
+        key = tuple(violations) if violations else ()
+        try:
+            return _format_scope_violations_cached(key)
+        except TypeError:  # unhashable entries (e.g. objects in Gemini's JSON)
+            return _format_scope_violations_cached.__wrapped__(key)
+    
+    @staticmethod
+    def _format_penalty_block(metrics: Dict[str, Any]) -> str:
+        """Format the penalty section for QA report (empty when no penalty was applied)."""
+        penalties = metrics.get('penalties_applied')
+        if not penalties or penalties.get('total_penalty', 0) <= 0:
+            return ""
         
-        result = "**⚠️ SCOPE VIOLATIONS DETECTED:**\n"
-        for violation in violations:
-            if violation:  # Skip empty strings
-                result += f"- {violation}\n"
-        return result
+        lines = [f"""
+
+## Penalty System Applied
+- **Original Score:** {metrics.get('original_overall_score', 'N/A')}/10
+- **Penalties Applied:** -{penalties.get('total_penalty', 0)} points
+- **Final Score:** {metrics.get('overall_score', 'N/A')}/10
+
+### Penalty Breakdown:
+"""]
+        lines.extend(f"- {note}\n" for note in penalties.get('penalty_notes', []))
+        return "".join(lines)
     
     @staticmethod
     def apply_diagram_penalties(metrics: Dict[str, Any], diagram_contents: Dict[str, str]) -> Dict[str, Any]:
@@ -43,54 +99,85 @@ class ValidationHandler:
         """
         missing_diagrams = []
         error_diagrams = []
-        penalty_notes = []
         
-        # Check each diagram type
+        # Check each diagram type in one pass, with the lookups bound outside the loop
+        add_missing = missing_diagrams.append
+        add_error = error_diagrams.append
+        find_error = ERROR_MARKER_RE.search
         for diagram_type, content in diagram_contents.items():
-            if not content or content == "Not generated":
-                missing_diagrams.append(diagram_type)
-            elif "Diagram generation failed" in content or "Error reading file" in content:
-                error_diagrams.append(diagram_type)
-        
-        # Calculate penalties
-        missing_penalty = len(missing_diagrams) * 5
-        error_penalty = len(error_diagrams) * 3
-        total_penalty = missing_penalty + error_penalty
+            if not content or content == NOT_GENERATED_MARKER:
+                add_missing(diagram_type)
+            elif find_error(content):
+                add_error(diagram_type)
+        missing_count = len(missing_diagrams)
+        error_count = len(error_diagrams)
         
         # Get original overall score (default to 10 if not provided)
         original_score = metrics.get('overall_score', 10)
         
+        # Fast path: every diagram is present and valid, so there is nothing to note
+        if not missing_count and not error_count:
+            metrics['original_overall_score'] = original_score
+            metrics['overall_score'] = max(0, original_score)
+            metrics['penalties_applied'] = {
+                'missing_diagrams': 0,
+                'missing_diagram_list': missing_diagrams,
+                'error_diagrams': 0,
+                'error_diagram_list': error_diagrams,
+                'total_penalty': 0,
+                'penalty_notes': []
+            }
+            return metrics
+        
+        # Calculate penalties
+        missing_penalty, error_penalty = _compute_penalty(missing_count, error_count)
+        total_penalty = missing_penalty + error_penalty
+        
         # Apply penalties
         adjusted_score = max(0, original_score - total_penalty)
         
         # Create penalty notes
-        if missing_diagrams:
-            penalty_notes.append(f"-{missing_penalty} points: {len(missing_diagrams)} missing diagram(s) - {', '.join(missing_diagrams)}")
-        if error_diagrams:
-            penalty_notes.append(f"-{error_penalty} points: {len(error_diagrams)} diagram(s) with errors - {', '.join(error_diagrams)}")
+        penalty_notes = []
+        if missing_count:
+            penalty_notes.append(f"-{missing_penalty} points: {missing_count} missing diagram(s) - {', '.join(missing_diagrams)}")
+        if error_count:
+            penalty_notes.append(f"-{error_penalty} points: {error_count} diagram(s) with errors - {', '.join(error_diagrams)}")
         
         # Update metrics
         metrics['original_overall_score'] = original_score
         metrics['overall_score'] = adjusted_score
         metrics['penalties_applied'] = {
-            'missing_diagrams': len(missing_diagrams),
+            'missing_diagrams': missing_count,
             'missing_diagram_list': missing_diagrams,
-            'error_diagrams': len(error_diagrams),
+            'error_diagrams': error_count,
             'error_diagram_list': error_diagrams,
             'total_penalty': total_penalty,
             'penalty_notes': penalty_notes
         }
         
         # Add penalty explanation to gap analysis
-        if penalty_notes:
-            penalty_summary = " | ".join(penalty_notes)
-            if 'gap_analysis' in metrics:
-                metrics['gap_analysis'] = f"[PENALTIES APPLIED: {penalty_summary}] " + metrics['gap_analysis']
-            else:
-                metrics['gap_analysis'] = f"[PENALTIES APPLIED: {penalty_summary}]"
+        penalty_summary = " | ".join(penalty_notes)
+        if 'gap_analysis' in metrics:
+            metrics['gap_analysis'] = f"[PENALTIES APPLIED: {penalty_summary}] " + metrics['gap_analysis']
+        else:
+            metrics['gap_analysis'] = f"[PENALTIES APPLIED: {penalty_summary}]"
         
         return metrics
 
+    @staticmethod
+    def apply_diagram_penalties_batch(cases: List[Tuple[Dict[str, Any], Dict[str, str]]]) -> List[Dict[str, Any]]:
+        """
+        Apply diagram penalties to several (metrics, diagram_contents) pairs in one call.
+        
+        Args:
+            cases (List[Tuple]): (metrics, diagram_contents) pairs as accepted by apply_diagram_penalties
+            
+        Returns:
+            List[Dict]: Updated metrics for each pair, in input order
+        """
+        apply = ValidationHandler.apply_diagram_penalties
+        return [apply(metrics, diagram_contents) for metrics, diagram_contents in cases]
+    
     @staticmethod
     def save_iteration_qa_report(validation_result: Dict, slice_name: str, iteration_num: int) -> str:
         """
@@ -109,61 +196,50 @@ class ValidationHandler:
             timestamp = validation_result.get('timestamp', 'Unknown')
             
             # Include penalty information if available
-            penalty_info = ""
-            if 'penalties_applied' in metrics:
-                penalties = metrics['penalties_applied']
-                if penalties.get('total_penalty', 0) > 0:
-                    penalty_info = f"""
-
-## Penalty System Applied
-- **Original Score:** {metrics.get('original_overall_score', 'N/A')}/10
-- **Penalties Applied:** -{penalties.get('total_penalty', 0)} points
-- **Final Score:** {metrics.get('overall_score', 'N/A')}/10
-
-### Penalty Breakdown:
-"""
-                    for note in penalties.get('penalty_notes', []):
-                        penalty_info += f"- {note}\n"
+            penalty_info = ValidationHandler._format_penalty_block(metrics)
+            
+            # Fill in every missing field with one merge instead of a .get() per field
+            report = {**QA_REPORT_DEFAULTS, **metrics}
             
-            report_content = f"""# QA Validation Report - Iteration {iteration_num}
+            # Collect the report in pieces and write them out directly, rather than growing a string per line
+            parts = [f"""# QA Validation Report - Iteration {iteration_num}
 **Slice:** {slice_name}
 **Version:** v{iteration_num}
 **Timestamp:** {timestamp}
 
 ## Validation Scores
-- **Overall Score:** {metrics.get('overall_score', 'N/A')}/10
-- **Scope Adherence Score:** {metrics.get('scope_adherence_score', 'N/A')}/10
-- **Consistency Score:** {metrics.get('consistency_score', 'N/A')}/10
-- **Completeness Score:** {metrics.get('completeness_score', 'N/A')}/10
-- **Quality Score:** {metrics.get('quality_score', 'N/A')}/10{penalty_info}
+- **Overall Score:** {report['overall_score']}/10
+- **Scope Adherence Score:** {report['scope_adherence_score']}/10
+- **Consistency Score:** {report['consistency_score']}/10
+- **Completeness Score:** {report['completeness_score']}/10
+- **Quality Score:** {report['quality_score']}/10{penalty_info}
 
 ## Detailed Analysis
 
 ### Scope Adherence Analysis
-{metrics.get('scope_adherence_analysis', 'No scope analysis provided')}
+{report['scope_adherence_analysis']}
 
 {ValidationHandler._format_scope_violations(metrics.get('scope_violations', []))}
 
 ### Consistency Analysis
-{metrics.get('consistency_analysis', 'No analysis provided')}
+{report['consistency_analysis']}
 
 ### Completeness Analysis
-{metrics.get('completeness_analysis', 'No analysis provided')}
+{report['completeness_analysis']}
 
 ### Quality Analysis
-{metrics.get('quality_analysis', 'No analysis provided')}
+{report['quality_analysis']}
 
 ### Gap Analysis
-{metrics.get('gap_analysis', 'No gaps identified')}
+{report['gap_analysis']}
 
 ## Recommendations
-"""
+"""]
             recommendations = metrics.get('recommendations', [])
             if recommendations:
-                for i, rec in enumerate(recommendations, 1):
-                    report_content += f"{i}. {rec}\n"
+                parts.extend(f"{i}. {rec}\n" for i, rec in enumerate(recommendations, 1))
             else:
-                report_content += "No specific recommendations provided.\n"
+                parts.append("No specific recommendations provided.\n")
             
             # Save report
             reports_dir = "reports"
@@ -173,7 +249,7 @@ class ValidationHandler:
             report_path = os.path.join(reports_dir, report_filename)
             
             with open(report_path, 'w', encoding='utf-8') as f:
-                f.write(report_content)
+                f.writelines(parts)
             
             print(f"  📄 QA report saved: {report_path}")
             return report_path
@@ -181,3 +257,89 @@ class ValidationHandler:
         except Exception as e:
             print(f"  ❌ Failed to save QA report: {e}")
             return None
+    
+    @staticmethod
+    def save_refinement_history_report(iteration_history: Dict[str, Any]) -> Optional[str]:
+        """
+        Save a markdown report summarizing every iteration of a refinement loop run.
+        
+        Args:
+            iteration_history (Dict): History returned by RefinementLoop.run_iterative_refinement
+            
+        Returns:
+            str: Path to saved report file, or None if it could not be written
+        """
+        try:
+            slice_name = iteration_history.get('slice_name', 'RequirementSlice')
+            iterations = iteration_history.get('iterations', [])
+            timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            
+            parts = [f"""# Iterative Refinement History Report
+**Slice:** {slice_name}
+**Generated:** {timestamp}
+
+## Summary
+- **Total Iterations:** {iteration_history.get('total_iterations', 0)}
+- **Max Iterations:** {iteration_history.get('max_iterations', 'N/A')}
+- **Target Score:** {iteration_history.get('target_score', 'N/A')}/10
+- **Final Score:** {iteration_history.get('final_score', 0)}/10
+- **Target Achieved:** {'✅ Yes' if iteration_history.get('target_achieved') else '❌ No'}
+
+## Score Progression
+
+| Iteration | Overall | Consistency | Completeness | Quality | Delta |
+|-----------|---------|-------------|--------------|---------|-------|
+"""]
+            previous_score = 0
+            for iteration in iterations:
+                metrics = (iteration.get('validation') or {}).get('metrics', {})
+                overall = metrics.get('overall_score', 0)
+                delta = overall - previous_score if isinstance(overall, (int, float)) else 0
+                previous_score = overall if isinstance(overall, (int, float)) else previous_score
+                parts.append(
+                    f"| {iteration.get('iteration_num')} ({iteration.get('version')}) "
+                    f"| {overall}/10 "
+                    f"| {metrics.get('consistency_score', 'N/A')}/10 "
+                    f"| {metrics.get('completeness_score', 'N/A')}/10 "
+                    f"| {metrics.get('quality_score', 'N/A')}/10 "
+                    f"| {f'+{delta}' if delta > 0 else delta} |\n"
+                )
+            parts.append("\n---\n")
+            
+            for iteration in iterations:
+                metrics = (iteration.get('validation') or {}).get('metrics', {})
+                parts.append(f"\n## Iteration {iteration.get('iteration_num')} ({iteration.get('version')})\n\n### Generated Diagrams\n")
+                for diagram_type, info in (iteration.get('diagrams') or {}).items():
+                    status = f"❌ {info['error']}" if 'error' in info else f"✅ {info.get('image')}"
+                    parts.append(f"- **{diagram_type.capitalize()}:** {status}\n")
+                
+                parts.append(f"""
+### Validation Scores
+- **Overall:** {metrics.get('overall_score', 'N/A')}/10
+- **Consistency:** {metrics.get('consistency_score', 'N/A')}/10
+- **Completeness:** {metrics.get('completeness_score', 'N/A')}/10
+- **Quality:** {metrics.get('quality_score', 'N/A')}/10
+
+### Key Findings
+**Gaps:** {(metrics.get('gap_analysis') or 'N/A')[:200]}...
+
+### Recommendations
+""")
+                parts.extend(f"- {rec}\n" for rec in metrics.get('recommendations', []))
+                
+                qa_report_path = iteration.get('qa_report_path')
+                if qa_report_path:
+                    parts.append(f"\n**Full QA Report:** [{os.path.basename(qa_report_path)}]"
+                                 f"({Path(qa_report_path).resolve().as_uri()})\n")
+                parts.append("\n---\n")
+            
+            report_path = f"refinement_history_{slice_name}.md"
+            with open(report_path, 'w', encoding='utf-8') as f:
+                f.writelines(parts)
+            
+            print(f"  📄 Refinement history saved: {report_path}")
+            return report_path
+            
+        except Exception as e:
+            print(f"  ❌ Failed to save refinement history: {e}")
+            return None